@@ -3,8 +3,6 @@ import ArrowBackIcon from '@mui/icons-material/ArrowBack'
 import DeleteIcon from '@mui/icons-material/Delete'
 import { useNavigate, useParams } from 'react-router-dom'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
-import ReactMarkdown from 'react-markdown'
-import remarkGfm from 'remark-gfm'
 import { blogService } from '@/services/blogService'
 import { useAuth } from '@/context/AuthContext'
 
@@ -18,7 +16,7 @@ function BlogDetailPage() {
 
   const { data: blog, isLoading, error, isError } = useQuery({
     queryKey: ['blog', id],
-    queryFn: () => blogService.getById(id!),
+    queryFn: () => blogService.getRendered(id!),
     enabled: !!id,
     retry: 1,
     staleTime: 1000 * 60 * 5,
@@ -202,9 +200,9 @@ function BlogDetailPage() {
                 my: 3,
               },
             }}
-          >
-            <ReactMarkdown remarkPlugins={[remarkGfm]}>{blog.content}</ReactMarkdown>
-          </Box>
+            // Rendered and sanitized by the server (raw HTML in markdown is escaped)
+            dangerouslySetInnerHTML={{ __html: blog.html }}
+          />
         </Box>
       </Container>
     </Box>
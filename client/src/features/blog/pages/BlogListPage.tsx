@@ -1,7 +1,7 @@
 import { Container, Typography, Grid, Card, CardContent, CardActionArea, Chip, Box, useTheme, Button, CircularProgress } from '@mui/material'
 import AddIcon from '@mui/icons-material/Add'
 import { useNavigate } from 'react-router-dom'
-import { useQuery } from '@tanstack/react-query'
+import { useInfiniteQuery } from '@tanstack/react-query'
 import { blogService } from '@/services/blogService'
 import { useAuth } from '@/context/AuthContext'
 
@@ -11,9 +11,12 @@ function BlogListPage() {
   const isDark = theme.palette.mode === 'dark'
   const { isAuthenticated } = useAuth()
 
-  const { data: blogs, isLoading, error } = useQuery({
+  const { data: blogs, isLoading, error, hasNextPage, fetchNextPage, isFetchingNextPage } = useInfiniteQuery({
     queryKey: ['blogs'],
-    queryFn: blogService.getAll,
+    queryFn: ({ pageParam }) => blogService.getAll(pageParam),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (page) => page.next_cursor ?? undefined,
+    select: (data) => data.pages.flatMap((page) => page.blogs),
   })
 
   return (
@@ -128,6 +131,19 @@ function BlogListPage() {
             </Grid>
           ))}
         </Grid>
+
+        {hasNextPage && (
+          <Box className="flex justify-center mt-8">
+            <Button
+              variant="outlined"
+              onClick={() => fetchNextPage()}
+              disabled={isFetchingNextPage}
+              sx={{ borderColor: '#6366f1', color: isDark ? '#a5b4fc' : '#4f46e5' }}
+            >
+              {isFetchingNextPage ? <CircularProgress size={20} /> : 'Load more'}
+            </Button>
+          </Box>
+        )}
       </Container>
     </Box>
   )
@@ -7,12 +7,27 @@ const api = axios.create({
   },
 })
 
+// Returned by the server after a write; sending it back makes later reads see that write.
+const CAUSAL_TOKEN_HEADER = 'x-causal-token'
+
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('token')
   if (token) {
     config.headers.Authorization = `Bearer ${token}`
   }
+  const causalToken = sessionStorage.getItem(CAUSAL_TOKEN_HEADER)
+  if (causalToken) {
+    config.headers[CAUSAL_TOKEN_HEADER] = causalToken
+  }
   return config
 })
 
+api.interceptors.response.use((response) => {
+  const causalToken = response.headers[CAUSAL_TOKEN_HEADER]
+  if (causalToken) {
+    sessionStorage.setItem(CAUSAL_TOKEN_HEADER, causalToken)
+  }
+  return response
+})
+
 export default api
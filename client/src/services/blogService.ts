@@ -1,9 +1,9 @@
 import api from './api'
-import { Blog, BlogCreate } from '@/types'
+import { Blog, BlogCreate, BlogPage, RenderedBlog } from '@/types'
 
 export const blogService = {
-  getAll: async (): Promise<Blog[]> => {
-    const response = await api.get('/blogs')
+  getAll: async (cursor?: string, limit?: number): Promise<BlogPage> => {
+    const response = await api.get('/blogs', { params: { cursor, limit } })
     return response.data
   },
 
@@ -12,6 +12,16 @@ export const blogService = {
     return response.data
   },
 
+  getRendered: async (id: string): Promise<RenderedBlog> => {
+    const response = await api.get(`/blogs/${id}`, { params: { format: 'html' } })
+    return response.data
+  },
+
+  getBatch: async (ids: string[]): Promise<Blog[]> => {
+    const response = await api.get('/blogs/batch', { params: { ids: ids.join(',') } })
+    return response.data.blogs
+  },
+
   create: async (data: BlogCreate): Promise<Blog> => {
     const response = await api.post('/blogs', data)
     return response.data
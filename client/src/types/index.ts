@@ -28,13 +28,35 @@ export interface Blog {
   title: string
   content: string
   excerpt: string
+  word_count: number
+  reading_time: number
   author: string
   author_id: string
   tags: string[]
+  views: number
+  unique_readers: number
   created_at: string
   updated_at: string
 }
 
+export type BlogSummary = Omit<Blog, 'content'>
+
+export interface TocEntry {
+  level: number
+  text: string
+  id: string
+}
+
+export interface RenderedBlog extends BlogSummary {
+  html: string
+  toc: TocEntry[]
+}
+
+export interface BlogPage {
+  blogs: BlogSummary[]
+  next_cursor: string | null
+}
+
 export interface BlogCreate {
   title: string
   content: string
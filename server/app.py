@@ -1,9 +1,60 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
+from pymongo.errors import WaitQueueTimeoutError
 from fastapi.middleware.cors import CORSMiddleware
 from routes.auth_routes import router as auth_router
-from routes.blog_routes import router as blog_router
+from routes.tag_routes import router as tag_router
+from routes.transfer_routes import router as transfer_router, export_stats, import_stats
+from routes.blog_routes import (
+    router as blog_router, blog_cache, blog_flights, page_flights, search_index, title_suggestions,
+    view_counter, trending_feed, reader_sketches,
+)
+import database
+from database import blogs_collection, pool_stats
+from search import build_index
+from tags import sync_tag_counts, tag_counts
+from suggest import build_title_index
+from indexes import apply_indexes
+from auth import password_executor, token_cache
+from compression import CompressionMiddleware, Compressor
+from routing import CAUSAL_HEADER
+import os
+
+compressor = Compressor(
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    gzip_level=int(os.getenv("GZIP_LEVEL", "6")),
+    brotli_quality=int(os.getenv("BROTLI_QUALITY", "5")),
+    zstd_level=int(os.getenv("ZSTD_LEVEL", "3")),
+    cache_max_bytes=int(os.getenv("COMPRESSION_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    cache_ttl=float(os.getenv("COMPRESSION_CACHE_TTL_SECONDS", "30")),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    database.connect()
+    await apply_indexes(database.get_db())
+    # Built in the background so a large collection doesn't hold up startup; search answers 503 until ready.
+    background = [
+        asyncio.create_task(build_index(search_index, blogs_collection)),
+        asyncio.create_task(sync_tag_counts()),
+        asyncio.create_task(build_title_index(title_suggestions, blogs_collection)),
+        asyncio.create_task(view_counter.run()),
+        asyncio.create_task(trending_feed.run()),
+        asyncio.create_task(reader_sketches.run()),
+    ]
+    yield
+    for task in background:
+        task.cancel()
+    await view_counter.close()
+    await reader_sketches.close()
+    password_executor.shutdown()
+    database.close()
 
-app = FastAPI(title="TechBlog API")
+
+app = FastAPI(title="TechBlog API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,12 +62,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CAUSAL_HEADER],
 )
+app.add_middleware(CompressionMiddleware, compressor=compressor)
+
+
+@app.exception_handler(WaitQueueTimeoutError)
+async def pool_exhausted(request: Request, exc: WaitQueueTimeoutError):
+    # Every pooled connection stayed busy for MONGO_WAIT_QUEUE_TIMEOUT_MS: shed load rather than queue.
+    return ORJSONResponse({"detail": "Database is busy, try again"}, status_code=503, headers={"Retry-After": "1"})
 
 app.include_router(auth_router)
+app.include_router(transfer_router)
 app.include_router(blog_router)
+app.include_router(tag_router)
 
 
 @app.get("/api/health")
 def health_check():
     return {"status": "ok", "message": "Server is running"}
+
+
+@app.get("/api/stats")
+def stats():
+    return {
+        "blog_cache": blog_cache.stats(),
+        "blog_flights": blog_flights.stats(),
+        "page_flights": page_flights.stats(),
+        "password_executor": password_executor.stats(),
+        "token_cache": token_cache.stats(),
+        "search_index": search_index.stats(),
+        "title_suggestions": title_suggestions.stats(),
+        "tag_suggestions": tag_counts.suggestions.stats(),
+        "view_counter": view_counter.stats(),
+        "trending": trending_feed.stats(),
+        "reader_sketches": reader_sketches.stats(),
+        "export": export_stats.stats(),
+        "import": import_stats.stats(),
+        "compression": compressor.stats(),
+        "mongo_pool": pool_stats.stats(),
+    }
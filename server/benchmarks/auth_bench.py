@@ -0,0 +1,32 @@
+"""
+Per-request auth overhead with and without the verified-token cache.
+Run from the server folder: python -m benchmarks.auth_bench
+"""
+
+import time
+from jose import jwt
+from auth import ALGORITHM, SECRET_KEY, create_access_token, decode_token, token_cache
+
+ITERATIONS = 20000
+
+
+def bench(label: str, fn, token: str):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(token)
+    per_call = (time.perf_counter() - start) / ITERATIONS * 1e6
+    print(f"{label:28} {per_call:8.2f} us/request")
+
+
+def main():
+    token = create_access_token({"user_id": "64b000000000000000000000", "email": "a@b.c", "name": "Bench"})
+
+    bench("jwt.decode (before)", lambda t: jwt.decode(t, SECRET_KEY, algorithms=[ALGORITHM]), token)
+    token_cache.clear()
+    decode_token(token)
+    bench("decode_token cached (after)", decode_token, token)
+    print(token_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
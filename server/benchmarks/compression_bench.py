@@ -0,0 +1,77 @@
+"""
+Compression ratio and cost per level on typical API responses; used to pick the defaults
+in compression.py. Run from the server folder: python -m benchmarks.compression_bench
+"""
+
+import gzip
+import json
+import time
+from datetime import datetime
+from bson import ObjectId
+from rendering import render_markdown
+from seed_blogs import BLOGS
+from summaries import summarize
+from synthetic import generate_posts
+from compression import brotli, zstandard
+
+REPEAT = 20
+LEVELS = {
+    "gzip": [1, 4, 6, 9],
+    "br": [1, 4, 5, 6, 9, 11],
+    "zstd": [1, 3, 6, 9, 19],
+}
+
+
+def response(post: dict, body: bool) -> dict:
+    doc = {k: v for k, v in post.items() if body or k not in ("content", "html", "toc")}
+    return {"id": str(ObjectId()), "views": 1234, "unique_readers": 987, **doc}
+
+
+def payloads() -> dict:
+    now = datetime.utcnow()
+    seeded = [
+        {**blog, **summarize(blog["content"]), **render_markdown(blog["content"]), "author": "Admin",
+         "author_id": str(ObjectId()), "created_at": now, "updated_at": now}
+        for blog in BLOGS
+    ]
+    authors = [{"_id": ObjectId(), "name": f"Author {i}"} for i in range(20)]
+    feed = [response(post, body=False) for post in generate_posts(100, authors)]
+    largest = max(seeded, key=lambda post: len(post["content"]))
+    encode = lambda value: json.dumps(value, default=str).encode("utf-8")  # noqa: E731
+    return {
+        "post": encode({k: v for k, v in response(largest, body=True).items() if k not in ("html", "toc")}),
+        "post?format=html": encode({k: v for k, v in response(largest, body=True).items() if k != "content"}),
+        "feed (100 posts)": encode({"blogs": feed, "next_cursor": "x" * 40}),
+    }
+
+
+def codec(name: str, level: int):
+    if name == "gzip":
+        return lambda data: gzip.compress(data, compresslevel=level, mtime=0)
+    if name == "br":
+        return lambda data: brotli.compress(data, mode=brotli.MODE_TEXT, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress
+
+
+def main():
+    available = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    for label, data in payloads().items():
+        print(f"\n{label}: {len(data)} bytes")
+        print(f"{'encoding':10} {'level':>5} {'bytes':>8} {'ratio':>7} {'us':>9} {'MB/s':>8}")
+        for name, levels in LEVELS.items():
+            if not available[name]:
+                print(f"{name:10} (not installed)")
+                continue
+            for level in levels:
+                compress = codec(name, level)
+                out = compress(data)
+                start = time.perf_counter()
+                for _ in range(REPEAT):
+                    compress(data)
+                seconds = (time.perf_counter() - start) / REPEAT
+                print(f"{name:10} {level:>5} {len(out):>8} {len(out) / len(data):>7.3f} "
+                      f"{seconds * 1e6:>9.0f} {len(data) / seconds / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Serialization cost of one list page (100 posts) as FastAPI renders it: untyped dicts through
+jsonable_encoder + JSONResponse (before) vs the BlogPage response model + ORJSONResponse (after).
+Run from the server folder: python -m benchmarks.serialization_bench
+"""
+
+import asyncio
+import time
+from bson import ObjectId
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from models import BlogPage
+from routes.blog_routes import blog_to_response
+from synthetic import generate_posts
+
+PAGE_SIZE = 100
+ITERATIONS = 500
+
+
+async def bench(label: str, field, response_class, page: dict):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        content = await serialize_response(field=field, response_content=page)
+        body = response_class(content).body
+    per_page = (time.perf_counter() - start) / ITERATIONS * 1e3
+    print(f"{label:36} {per_page:7.3f} ms/page  ({len(body)} bytes)")
+
+
+async def main():
+    authors = [{"_id": ObjectId(), "name": f"Author {i}"} for i in range(20)]
+    blogs = []
+    for post in generate_posts(PAGE_SIZE, authors):
+        post["_id"] = ObjectId()
+        post.pop("content")
+        blogs.append(blog_to_response(post))
+    page = {"blogs": blogs, "next_cursor": "MjAyNC0wMS0wMVQwMDowMDowMHw2NWEwMDAwMDAwMDAwMDAwMDAwMDAwMDA="}
+
+    await bench("jsonable_encoder + JSONResponse", None, JSONResponse, page)
+    await bench("BlogPage model + ORJSONResponse", create_model_field("page", BlogPage, mode="serialization"),
+                ORJSONResponse, page)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
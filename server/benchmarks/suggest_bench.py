@@ -0,0 +1,42 @@
+"""
+Typeahead latency and memory over a synthetic title corpus.
+Run from the server folder: python -m benchmarks.suggest_bench [entries]
+"""
+
+import random
+import sys
+import time
+from suggest import PrefixIndex
+from synthetic import TITLE_PATTERNS, TOPICS
+
+QUERIES = 20000
+
+
+def main(entries: int = 1_000_000):
+    rng = random.Random(7)
+    titles = [
+        f"{rng.choice(TITLE_PATTERNS).format(a=rng.choice(TOPICS), b=rng.choice(TOPICS))} {i}"
+        for i in range(entries)
+    ]
+
+    index = PrefixIndex()
+    start = time.perf_counter()
+    index.build((i, title, rng.random() * 1000) for i, title in enumerate(titles))
+    print(f"built {len(index)} entries in {time.perf_counter() - start:.1f}s")
+
+    timings = []
+    for _ in range(QUERIES):
+        title = rng.choice(titles)
+        prefix = title[:rng.randint(1, min(12, len(title)))]
+        start = time.perf_counter()
+        index.suggest(prefix, 8)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    for label, q in (("p50", 0.5), ("p99", 0.99), ("max", 1.0)):
+        print(f"{label}: {timings[min(len(timings) - 1, int(q * len(timings)))] * 1000:.3f} ms")
+    print(f"memory: {index.stats()['memory_bytes'] / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,97 @@
+"""
+Write-behind view counters: reads only bump an in-memory Counter, and the accumulated
+deltas are flushed as one unordered bulk_write of $inc operations every few seconds or
+once enough increments pile up. On shutdown the lifespan calls close(), which waits for an
+in-flight flush and then flushes one last time.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self, collection, interval: float, threshold: int, field: str = "views",
+                 extra_stages: Optional[Callable[[int, datetime], list]] = None,
+                 on_flush: Optional[Callable[[Counter], None]] = None):
+        self.collection = collection
+        self.interval = interval
+        self.threshold = threshold
+        self.field = field
+        # Optional pipeline stages run in the same update (e.g. trending decay), given (delta, now).
+        self.extra_stages = extra_stages
+        # Called with the flushed {blog_id: delta} batch once it is persisted (e.g. to re-rank suggestions).
+        self.on_flush = on_flush
+        self.pending: Counter = Counter()
+        self._pending_total = 0
+        self._flushing = None
+        self.flushes = 0
+        self.flushed_increments = 0
+
+    def record(self, blog_id: str, n: int = 1):
+        self.pending[blog_id] += n
+        self._pending_total += n
+        if self._pending_total >= self.threshold:
+            self._start_flush()
+
+    def count(self, blog: dict) -> int:
+        """Persisted count on the document plus increments not flushed yet."""
+        return blog.get(self.field, 0) + self.pending.get(str(blog["_id"]), 0)
+
+    async def flush(self):
+        batch, self.pending, self._pending_total = self.pending, Counter(), 0
+        try:
+            if batch:
+                now = datetime.utcnow()
+                operations = [UpdateOne({"_id": ObjectId(blog_id)}, self._update(n, now))
+                              for blog_id, n in batch.items()]
+                await self.collection.bulk_write(operations, ordered=False)
+                self.flushes += 1
+                self.flushed_increments += sum(batch.values())
+        except Exception:
+            # Put the deltas back so the next flush retries them.
+            logger.exception("Failed to flush %s counters", self.field)
+            self.pending.update(batch)
+            self._pending_total += sum(batch.values())
+        else:
+            if batch and self.on_flush is not None:
+                self.on_flush(batch)
+
+    def _start_flush(self) -> asyncio.Future:
+        """The flush in flight, starting one if none is; at most one background flush runs at a time."""
+        if self._flushing is None:
+            self._flushing = asyncio.ensure_future(self.flush())
+            self._flushing.add_done_callback(lambda _: setattr(self, "_flushing", None))
+        return self._flushing
+
+    def _update(self, n: int, now: datetime):
+        if self.extra_stages is None:
+            return {"$inc": {self.field: n}}
+        increment = {"$set": {self.field: {"$add": [{"$ifNull": [f"${self.field}", 0]}, n]}}}
+        return [increment, *self.extra_stages(n, now)]
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            # Shielded: cancelling this loop on shutdown must not abandon a batch already taken out of pending.
+            await asyncio.shield(self._start_flush())
+
+    async def close(self):
+        """Wait for an in-flight flush, then flush what is left; call after cancelling run()."""
+        if self._flushing is not None:
+            await self._flushing
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending_posts": len(self.pending),
+            "pending_increments": self._pending_total,
+            "flushes": self.flushes,
+            "flushed_increments": self.flushed_increments,
+        }
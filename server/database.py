@@ -1,4 +1,21 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+"""
+MongoDB client lifecycle and connection pool settings.
+
+The client is created by `connect()` in the app lifespan (or a CLI's main) and closed by
+`close()`. Modules import the collection handles below at import time; each one resolves
+against the connected client when used.
+
+Size the pool per worker process: MONGO_MAX_POOL_SIZE x workers must stay under the
+server's connection limit. A request that waits longer than MONGO_WAIT_QUEUE_TIMEOUT_MS for a
+connection fails fast (503) instead of queueing indefinitely.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
 from dotenv import load_dotenv
 import os
 
@@ -7,10 +24,169 @@ load_dotenv()
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "techblog")
 
-client = AsyncIOMotorClient(MONGODB_URL)
-db = client[DATABASE_NAME]
+MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# Negotiated with the server in order; drivers skip any whose library isn't installed. Empty disables.
+COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,zlib")
 
-# Collections
-users_collection = db["users"]
-blogs_collection = db["blogs"]
 
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Per-server pool utilization from driver events (fired on the driver's threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = defaultdict(int)
+            self.in_use = defaultdict(int)
+            self.peak_in_use = defaultdict(int)
+            self.checkouts = defaultdict(int)
+            self.failures = defaultdict(lambda: defaultdict(int))
+            self.wait_seconds = defaultdict(float)
+            self.max_wait_seconds = defaultdict(float)
+            self.since = time.time()
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open[event.address] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open[event.address] -= 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            address = event.address
+            self.checkouts[address] += 1
+            self.in_use[address] += 1
+            self.peak_in_use[address] = max(self.peak_in_use[address], self.in_use[address])
+            self.wait_seconds[address] += event.duration or 0.0
+            self.max_wait_seconds[address] = max(self.max_wait_seconds[address], event.duration or 0.0)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use[event.address] -= 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.failures[event.address][event.reason] += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            servers = {}
+            for address in set(self.open) | set(self.checkouts) | set(self.failures):
+                checkouts = self.checkouts[address]
+                servers[f"{address[0]}:{address[1]}"] = {
+                    "open": self.open[address],
+                    "in_use": self.in_use[address],
+                    "peak_in_use": self.peak_in_use[address],
+                    "utilization": round(self.in_use[address] / MAX_POOL_SIZE, 3),
+                    "checkouts": checkouts,
+                    "avg_wait_ms": round(self.wait_seconds[address] / checkouts * 1000, 3) if checkouts else None,
+                    "max_wait_ms": round(self.max_wait_seconds[address] * 1000, 3),
+                    "failures": dict(self.failures[address]),
+                }
+            return {
+                "max_pool_size": MAX_POOL_SIZE,
+                "min_pool_size": MIN_POOL_SIZE,
+                "compressors": COMPRESSORS,
+                "since": self.since,
+                "servers": servers,
+            }
+
+
+pool_stats = PoolStats()
+_client: Optional[AsyncIOMotorClient] = None
+_db: Optional[AsyncIOMotorDatabase] = None
+
+
+def connect() -> AsyncIOMotorClient:
+    global _client, _db
+    if _client is None:
+        options = {
+            "maxPoolSize": MAX_POOL_SIZE,
+            "minPoolSize": MIN_POOL_SIZE,
+            "maxIdleTimeMS": MAX_IDLE_TIME_MS,
+            "waitQueueTimeoutMS": WAIT_QUEUE_TIMEOUT_MS,
+            "serverSelectionTimeoutMS": SERVER_SELECTION_TIMEOUT_MS,
+            "event_listeners": [pool_stats],
+        }
+        if COMPRESSORS:
+            options["compressors"] = COMPRESSORS
+        _client = AsyncIOMotorClient(MONGODB_URL, **options)
+        _db = _client[DATABASE_NAME]
+    return _client
+
+
+def close():
+    global _client, _db
+    if _client is not None:
+        _client.close()
+        _client = _db = None
+        pool_stats.reset()
+
+
+def get_client() -> AsyncIOMotorClient:
+    if _client is None:
+        raise RuntimeError("MongoDB client is not connected; call database.connect() first")
+    return _client
+
+
+def get_db() -> AsyncIOMotorDatabase:
+    if _db is None:
+        raise RuntimeError("MongoDB client is not connected; call database.connect() first")
+    return _db
+
+
+class LazyCollection:
+    """Module-level handle for a collection on whichever client is currently connected."""
+
+    def __init__(self, name: str, **options):
+        self.name = name
+        # Collection options (read_preference, read_concern, write_concern) applied on resolve.
+        self.options = options
+        self._db = None
+        self._collection = None
+
+    def with_options(self, **options) -> "LazyCollection":
+        return LazyCollection(self.name, **{**self.options, **options})
+
+    def __getattr__(self, attr):
+        db = get_db()
+        if self._db is not db:
+            self._db, self._collection = db, db.get_collection(self.name, **self.options)
+        return getattr(self._collection, attr)
+
+    def __repr__(self) -> str:
+        return f"LazyCollection({self.name!r})"
+
+
+# Collections
+users_collection = LazyCollection("users")
+blogs_collection = LazyCollection("blogs")
+tag_stats_collection = LazyCollection("tag_stats")
+related_posts_collection = LazyCollection("related_posts")
+reader_sketches_collection = LazyCollection("reader_sketches")
@@ -0,0 +1,63 @@
+from typing import FrozenSet, Optional
+from fastapi import HTTPException
+
+# Response field -> document fields it is built from.
+FIELD_SOURCES = {
+    "id": ("_id",),
+    "title": ("title",),
+    "content": ("content",),
+    # Posts without stored HTML are rendered from the body on read (blog_routes.rendered).
+    "html": ("html", "content", "content_hash"),
+    "toc": ("toc", "content", "content_hash"),
+    "excerpt": ("excerpt",),
+    "word_count": ("word_count",),
+    "reading_time": ("reading_time",),
+    "author": ("author",),
+    "author_id": ("author_id",),
+    "tags": ("tags",),
+    "views": ("views",),
+    "unique_readers": ("unique_readers",),
+    "created_at": ("created_at",),
+    "updated_at": ("updated_at",),
+}
+
+# Shape of a blog response when no fields are requested (`content` is added when loaded).
+DEFAULT_FIELDS = frozenset(FIELD_SOURCES) - {"content", "html", "toc"}
+
+# Counters that change without a new updated_at (see http_cache.make_etag).
+COUNTER_FIELDS = frozenset({"views", "unique_readers"})
+
+
+def parse_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    """Parse a `fields=id,title,tags` parameter; None means the route's default shape."""
+    if not fields:
+        return None
+    requested = frozenset(field.strip() for field in fields.split(",") if field.strip())
+    if not requested:
+        # `fields=,` or `fields= ` names nothing; an empty shape would fail the typed response models.
+        return None
+    unknown = sorted(requested - FIELD_SOURCES.keys())
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def fields_projection(fields: FrozenSet[str], *extra: str) -> dict:
+    projection = {"_id": 1}
+    for field in fields:
+        projection.update({source: 1 for source in FIELD_SOURCES[field]})
+    projection.update({source: 1 for source in extra})
+    return projection
+
+
+def html_fields(fields: Optional[FrozenSet[str]]) -> FrozenSet[str]:
+    """The `?format=html` variant of a shape: rendered HTML and TOC instead of the markdown body."""
+    return (fields or DEFAULT_FIELDS) - {"content"} | {"html", "toc"}
+
+
+def fields_key(fields: Optional[FrozenSet[str]]) -> str:
+    return ",".join(sorted(fields)) if fields else ""
+
+
+def has_counters(fields: Optional[FrozenSet[str]]) -> bool:
+    return fields is None or bool(fields & COUNTER_FIELDS)
@@ -0,0 +1,57 @@
+import hashlib
+import math
+from typing import Optional
+import numpy as np
+
+DEFAULT_PRECISION = 12  # 4096 one-byte registers, ~1.6% standard error
+
+
+def hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Dense HyperLogLog sketch; registers serialize to a fixed-size byte string."""
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytes] = None):
+        self.precision = precision
+        self.m = 1 << precision
+        if registers is None:
+            self.registers = np.zeros(self.m, dtype=np.uint8)
+        else:
+            if len(registers) != self.m:
+                raise ValueError(f"expected {self.m} registers, got {len(registers)}")
+            self.registers = np.frombuffer(registers, dtype=np.uint8).copy()
+
+    @staticmethod
+    def position(value: str, precision: int = DEFAULT_PRECISION) -> tuple:
+        """(register index, rank) for a value; compute once and `add_position` to several sketches."""
+        h = hash64(value)
+        bits = 64 - precision
+        remainder = h & ((1 << bits) - 1)
+        return h >> bits, bits - remainder.bit_length() + 1
+
+    def add_position(self, index: int, rank: int):
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, value: str):
+        self.add_position(*self.position(value, self.precision))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return self.registers.tobytes()
@@ -0,0 +1,39 @@
+import hashlib
+import os
+import time
+from typing import Optional
+from fastapi import Response
+
+# A single post changes rarely; the feed changes whenever anyone writes.
+BLOG_CACHE_CONTROL = "public, max-age=30, stale-while-revalidate=300"
+FEED_CACHE_CONTROL = "public, max-age=5, stale-while-revalidate=60"
+
+# View and reader counts change without moving updated_at. Representations that include them get a weak ETag
+# (equivalent, not byte-identical) that also rolls over every COUNTER_ETAG_SECONDS, bounding how old the
+# counts in a revalidated copy can be.
+COUNTER_ETAG_SECONDS = int(os.getenv("COUNTER_ETAG_SECONDS", "60"))
+
+
+def make_etag(*parts, counters: bool = False) -> str:
+    if counters:
+        parts += (int(time.time() // COUNTER_ETAG_SECONDS),)
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"' if counters else f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so a W/ prefix on either side still matches.
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return "*" in candidates or opaque in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def set_validators(response: Response, etag: str, cache_control: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
@@ -0,0 +1,139 @@
+"""
+Declarative index registry for the TechBlog collections.
+Applied on app startup; run offline before a deploy with:
+    python indexes.py           # create missing indexes
+    python indexes.py --check   # report drift only, exit 1 if any
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Options compared when reporting drift; anything else (v, ns, ...) is server metadata.
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds", "collation")
+# Only these collation options are declared; the server reports the rest with their defaults.
+COMPARED_COLLATION = ("locale", "strength")
+
+# Emails are unique regardless of case; queries must pass the same collation to use the index.
+EMAIL_COLLATION = {"locale": "en", "strength": 2}
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_1", unique=True, collation=EMAIL_COLLATION),
+    ],
+    "blogs": [
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_-1__id_-1"),
+        # Posts edited since a watermark (related.py refresh).
+        IndexModel([("updated_at", DESCENDING)], name="updated_at_-1"),
+        # Single-post ETag revalidation without the body. get_blog hints it; the _id fast path would otherwise
+        # skip it and fetch the document.
+        IndexModel([("_id", ASCENDING), ("updated_at", ASCENDING)], name="_id_1_updated_at_1"),
+        IndexModel([("author_id", ASCENDING)], name="author_id_1"),
+        IndexModel([("trend.rank", DESCENDING)], name="trend.rank_-1", sparse=True),
+        # Multikey; serves both tag lookups and the tag-filtered feed in keyset order.
+        IndexModel([("tags", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                   name="tags_1_created_at_-1__id_-1"),
+        IndexModel([("title", ASCENDING)], name="title_1"),
+    ],
+    "reader_sketches": [
+        IndexModel([("blog_id", ASCENDING), ("window", ASCENDING)], name="blog_id_1_window_1"),
+        # Day and week sketches carry expires_at; all-time sketches don't and are kept.
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_1", expireAfterSeconds=0),
+    ],
+}
+
+
+def _options(document: dict) -> dict:
+    options = {opt: document[opt] for opt in COMPARED_OPTIONS if opt in document}
+    if "collation" in options:
+        collation = options["collation"]
+        options["collation"] = {opt: collation[opt] for opt in COMPARED_COLLATION if opt in collation}
+    return options
+
+
+def _spec(document: dict) -> dict:
+    spec = {"key": [tuple(k) for k in document["key"].items()]}
+    spec.update(_options(document))
+    return spec
+
+
+def _existing_spec(info: dict) -> dict:
+    spec = {"key": [(field, int(direction) if isinstance(direction, float) else direction)
+                    for field, direction in info["key"]]}
+    spec.update(_options(info))
+    return spec
+
+
+async def index_drift(db) -> dict:
+    """Compare declared indexes with the server; returns {collection: {missing, changed, extra}}."""
+    report = {}
+    for collection_name, models in INDEXES.items():
+        existing = await db[collection_name].index_information()
+        existing.pop("_id_", None)
+        declared = {model.document["name"]: _spec(model.document) for model in models}
+
+        missing = [name for name in declared if name not in existing]
+        changed = [name for name in declared
+                   if name in existing and _existing_spec(existing[name]) != declared[name]]
+        extra = [name for name in existing if name not in declared]
+        if missing or changed or extra:
+            report[collection_name] = {"missing": missing, "changed": changed, "extra": extra}
+    return report
+
+
+async def apply_indexes(db) -> dict:
+    """Create every declared index. Safe to re-run; conflicts are reported, not raised."""
+    failures = {}
+    for collection_name, models in INDEXES.items():
+        for model in models:
+            try:
+                await db[collection_name].create_indexes([model])
+            except OperationFailure as exc:
+                failures[f"{collection_name}.{model.document['name']}"] = str(exc)
+                logger.warning("Could not create index %s.%s: %s",
+                               collection_name, model.document["name"], exc)
+
+    for collection_name, drift in (await index_drift(db)).items():
+        logger.warning("Index drift on %s: %s", collection_name, drift)
+    return failures
+
+
+async def sync_indexes(db, check_only: bool = False) -> int:
+    """Apply (unless check_only) and print drift; returns a process exit code."""
+    if not check_only:
+        failures = await apply_indexes(db)
+        for name, error in failures.items():
+            print(f"FAILED {name}: {error}")
+
+    drift = await index_drift(db)
+    for collection_name, report in drift.items():
+        for kind, names in report.items():
+            for name in names:
+                print(f"{kind.upper():8} {collection_name}.{name}")
+    if not drift:
+        print("Indexes match the registry.")
+    return 1 if drift else 0
+
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply or check TechBlog MongoDB indexes.")
+    parser.add_argument("--check", action="store_true", help="only report drift, do not create indexes")
+    args = parser.parse_args(argv)
+
+    from database import close, connect, get_db
+
+    connect()
+    try:
+        return await sync_indexes(get_db(), check_only=args.check)
+    finally:
+        close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(main()))
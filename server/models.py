@@ -32,14 +32,108 @@ class BlogUpdate(BaseModel):
     tags: Optional[List[str]] = None
 
 
-class BlogResponse(BaseModel):
+class AuthResponse(BaseModel):
+    message: str
+    token: str
+    user: UserResponse
+
+
+class MessageResponse(BaseModel):
+    message: str
+
+
+class BlogSummary(BaseModel):
     id: str
     title: str
-    content: str
     excerpt: str
+    word_count: int
+    reading_time: int
     author: str
     author_id: str
     tags: List[str]
+    views: int = 0
+    unique_readers: int = 0
     created_at: datetime
     updated_at: datetime
 
+
+class BlogResponse(BlogSummary):
+    content: str
+
+
+class TocEntry(BaseModel):
+    level: int
+    text: str
+    id: str
+
+
+class RenderedBlogResponse(BlogSummary):
+    html: str
+    toc: List[TocEntry]
+
+
+class BlogPage(BaseModel):
+    blogs: List[BlogSummary]
+    next_cursor: Optional[str]
+
+
+class BlogBatch(BaseModel):
+    blogs: List[BlogResponse]
+    missing: List[str]
+
+
+class TrendingBlog(BlogSummary):
+    trend_score: float
+
+
+class TrendingBlogs(BaseModel):
+    blogs: List[TrendingBlog]
+
+
+class SearchResult(BlogSummary):
+    snippet: str
+    score: float
+
+
+class SearchResults(BaseModel):
+    results: List[SearchResult]
+    total: int
+
+
+class RelatedBlog(BlogSummary):
+    score: float
+
+
+class RelatedBlogs(BaseModel):
+    related: List[RelatedBlog]
+
+
+class UniqueReaders(BaseModel):
+    today: int
+    this_week: int
+    all_time: int
+
+
+class TitleSuggestion(BaseModel):
+    id: str
+    title: str
+
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+
+class Suggestions(BaseModel):
+    titles: List[TitleSuggestion]
+    tags: List[TagCount]
+
+
+class TagList(BaseModel):
+    tags: List[TagCount]
+
+
+class ImportResult(BaseModel):
+    inserted: int
+    skipped_duplicates: int
+    invalid: int
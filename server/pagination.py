@@ -0,0 +1,47 @@
+import base64
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Feed order; must match the compound index on blogs (created_at, _id).
+FEED_SORT = [("created_at", -1), ("_id", -1)]
+
+
+def encode_cursor(blog: dict) -> str:
+    raw = f"{blog['created_at'].isoformat()}|{blog['_id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, blog_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), ObjectId(blog_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def cursor_filter(cursor: Optional[str]) -> dict:
+    if not cursor:
+        return {}
+    created_at, blog_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": blog_id}},
+        ]
+    }
+
+
+async def fetch_page(collection, query: dict, cursor: Optional[str], limit: int,
+                     projection: Optional[dict] = None, session=None) -> tuple:
+    keyset = cursor_filter(cursor)
+    if keyset:
+        query = {"$and": [query, keyset]} if query else keyset
+    docs = await collection.find(query, projection, session=session).sort(FEED_SORT).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
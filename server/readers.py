@@ -0,0 +1,166 @@
+"""
+Unique-reader estimates per post from HyperLogLog sketches.
+
+Reads fold into in-memory sketches for the current day, ISO week and all time. Every few
+seconds they are flushed in batches to `reader_sketches`, one document per (post, window)
+shared by every worker. Sketches merge by element-wise max, so a flush reads the stored
+registers, merges, and writes back only if the document's version hasn't moved; a worker
+that loses the race re-reads and merges again. Day and week sketches expire through a TTL
+index; the all-time estimate is denormalized onto the blog as `unique_readers` so
+responses need no extra query.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+import numpy as np
+from bson import Binary, ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from hll import DEFAULT_PRECISION, HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+DAY_RETENTION = timedelta(days=35)
+WEEK_RETENTION = timedelta(weeks=20)
+# Versioned merges retried per flush before the sketches go back to pending for the next one.
+MERGE_ATTEMPTS = 5
+
+
+def current_windows(now: datetime) -> List[tuple]:
+    """(window key, expires_at) for the windows a read at `now` counts towards."""
+    year, week, _ = now.isocalendar()
+    week_start = datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+    return [
+        (f"d:{now:%Y-%m-%d}", datetime(now.year, now.month, now.day) + timedelta(days=1) + DAY_RETENTION),
+        (f"w:{year}-W{week:02d}", week_start + timedelta(weeks=1) + WEEK_RETENTION),
+        ("all", None),
+    ]
+
+
+class ReaderSketches:
+    def __init__(self, collection, blogs, interval: float, precision: int = DEFAULT_PRECISION):
+        self.collection = collection
+        self.blogs = blogs
+        self.interval = interval
+        self.precision = precision
+        self.pending: Dict[tuple, HyperLogLog] = {}
+        self._expiry: Dict[str, datetime] = {}
+        self._flushing = None
+        self.flushes = 0
+
+    def record(self, blog_id: str, reader: str, now: datetime = None):
+        index, rank = HyperLogLog.position(reader, self.precision)
+        for window, expires_at in current_windows(now or datetime.utcnow()):
+            key = (blog_id, window)
+            sketch = self.pending.get(key)
+            if sketch is None:
+                sketch = self.pending[key] = HyperLogLog(self.precision)
+                self._expiry[window] = expires_at
+            sketch.add_position(index, rank)
+
+    @staticmethod
+    def doc_id(blog_id: str, window: str) -> str:
+        return f"{blog_id}:{window}"
+
+    async def flush(self):
+        batch, self.pending = self.pending, {}
+        expiry, self._expiry = self._expiry, {}
+        if not batch:
+            return
+        try:
+            unmerged = batch
+            for _ in range(MERGE_ATTEMPTS):
+                unmerged = await self._merge(unmerged, expiry)
+                if not unmerged:
+                    break
+
+            posts = sorted({blog_id for blog_id, _ in batch})
+            totals = await self.estimates(posts, ["all"], include_pending=False)
+            await self.blogs.bulk_write(
+                [UpdateOne({"_id": ObjectId(blog_id)}, {"$set": {"unique_readers": totals[blog_id]["all"]}})
+                 for blog_id in posts],
+                ordered=False,
+            )
+            self.flushes += 1
+        except Exception:
+            logger.exception("Failed to flush reader sketches")
+            unmerged = batch
+        for key, sketch in unmerged.items():
+            self.pending[key] = sketch.merge(self.pending[key]) if key in self.pending else sketch
+        for window in {window for _, window in unmerged}:
+            self._expiry.setdefault(window, expiry.get(window))
+
+    async def _merge(self, batch: Dict[tuple, HyperLogLog], expiry: Dict[str, datetime]) -> Dict[tuple, HyperLogLog]:
+        """Merge `batch` into the stored sketches; returns the ones another worker's write beat us to."""
+        versions = {}
+        ids = [self.doc_id(*key) for key in batch]
+        projection = {"blog_id": 1, "window": 1, "registers": 1, "version": 1}
+        async for doc in self.collection.find({"_id": {"$in": ids}}, projection):
+            key = (doc["blog_id"], doc["window"])
+            batch[key].merge(HyperLogLog(self.precision, doc["registers"]))
+            versions[key] = doc.get("version", 0)
+
+        operations = []
+        for key, sketch in batch.items():
+            fields = {"blog_id": key[0], "window": key[1], "registers": Binary(sketch.to_bytes())}
+            if expiry.get(key[1]):
+                fields["expires_at"] = expiry[key[1]]
+            operations.append(UpdateOne(
+                {"_id": self.doc_id(*key), "version": versions.get(key, {"$exists": False})},
+                {"$set": fields, "$inc": {"version": 1}},
+                upsert=key not in versions,
+            ))
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            conflicts = result.matched_count + result.upserted_count < len(operations)
+        except BulkWriteError as exc:
+            # A duplicate _id means another worker created the document first.
+            if any(error["code"] != 11000 for error in exc.details["writeErrors"]):
+                raise
+            conflicts = True
+
+        unmerged = {}
+        if conflicts:
+            # Merged means the stored registers now cover ours, whichever worker's write got them there.
+            unmerged = dict(batch)
+            async for doc in self.collection.find({"_id": {"$in": ids}}, {"blog_id": 1, "window": 1, "registers": 1}):
+                key = (doc["blog_id"], doc["window"])
+                if np.all(HyperLogLog(self.precision, doc["registers"]).registers >= batch[key].registers):
+                    del unmerged[key]
+        return unmerged
+
+    async def estimates(self, blog_ids: List[str], windows: List[str], include_pending: bool = True) -> dict:
+        """Merged sketch per (post, window), plus this worker's unflushed reads: {blog_id: {window: count}}."""
+        merged = defaultdict(lambda: HyperLogLog(self.precision))
+        query = {"blog_id": {"$in": blog_ids}, "window": {"$in": windows}}
+        async for doc in self.collection.find(query, {"blog_id": 1, "window": 1, "registers": 1}):
+            merged[(doc["blog_id"], doc["window"])].merge(HyperLogLog(self.precision, doc["registers"]))
+        if include_pending:
+            for (blog_id, window), sketch in self.pending.items():
+                if blog_id in blog_ids and window in windows:
+                    merged[(blog_id, window)].merge(sketch)
+        return {blog_id: {window: merged[(blog_id, window)].count() for window in windows} for blog_id in blog_ids}
+
+    def _start_flush(self) -> asyncio.Future:
+        if self._flushing is None:
+            self._flushing = asyncio.ensure_future(self.flush())
+            self._flushing.add_done_callback(lambda _: setattr(self, "_flushing", None))
+        return self._flushing
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            # Shielded so cancelling the loop on shutdown doesn't drop a batch mid-flush.
+            await asyncio.shield(self._start_flush())
+
+    async def close(self):
+        """Wait for an in-flight flush, then flush what is left; call after cancelling run()."""
+        if self._flushing is not None:
+            await self._flushing
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {"pending_sketches": len(self.pending), "flushes": self.flushes}
@@ -0,0 +1,261 @@
+"""
+Related-post recommendations from TF-IDF cosine similarity, precomputed by a worker.
+
+The all-pairs product is CPU-bound and grows with the square of the corpus, so it runs in
+its own process next to the API, which only reads `related_posts`:
+    python related.py          # full rebuild, then keep related_posts up to date
+    python related.py --once   # full rebuild and exit (e.g. from cron)
+
+The corpus is vectorized into an L2-normalized sparse matrix and every post's top-K
+neighbours are stored, so serving is a single lookup. Each refresh re-vectorizes only the
+posts that changed: edits (updated_at past the watermark), plus posts added or deleted
+since the last pass, found by diffing the set of _ids, since imported and seeded posts
+keep their own updated_at. Changed posts get new rows (old rows are tombstoned), and the
+only other posts recomputed are the ones whose neighbour lists the change can affect.
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
+from bson import ObjectId
+from pymongo import DeleteOne, UpdateOne
+from scipy import sparse
+from search import CONTENT_BOOST, TAG_BOOST, TITLE_BOOST, tokenize
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 5
+MAX_TERMS_PER_DOC = 64
+MAX_DF_RATIO = 0.5
+MIN_SCORE = 0.05
+CHUNK_ROWS = 512
+# Share of the corpus added or tombstoned since the last rebuild that triggers a full one.
+REBUILD_RATIO = 0.25
+REFRESH_INTERVAL_SECONDS = 30
+WRITE_BATCH_SIZE = 1000
+
+VECTOR_PROJECTION = {"title": 1, "tags": 1, "content": 1, "updated_at": 1}
+
+
+def term_counts(blog: dict) -> Counter:
+    counts = Counter()
+    for boost, text in (
+        (TITLE_BOOST, blog.get("title", "")),
+        (TAG_BOOST, " ".join(blog.get("tags", []))),
+        (CONTENT_BOOST, blog.get("content", "")),
+    ):
+        for token in tokenize(text):
+            counts[token] += boost
+    return Counter(dict(counts.most_common(MAX_TERMS_PER_DOC)))
+
+
+class RelatedPosts:
+    def __init__(self, collection, blogs):
+        self.collection = collection
+        self.blogs = blogs
+        self.ready = False
+        self.watermark: Optional[datetime] = None
+        self._vocab: Dict[str, int] = {}
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._ids: List[Optional[str]] = []
+        self._slot_of: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._neighbours = np.zeros((0, TOP_K), dtype=np.int64)
+        self._scores = np.zeros((0, TOP_K), dtype=np.float32)
+
+    def _vectorize(self, counts: List[Counter]) -> sparse.csr_matrix:
+        rows, cols, values = [], [], []
+        for row, doc in enumerate(counts):
+            for term, tf in doc.items():
+                col = self._vocab.get(term)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    values.append((1 + math.log(tf)) * self._idf[col])
+        matrix = sparse.csr_matrix(
+            (np.array(values, dtype=np.float32), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+            shape=(len(counts), len(self._vocab)),
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags(1 / norms) @ matrix, dtype=np.float32)
+
+    def _top_k(self, slots: np.ndarray):
+        """Recompute neighbour lists for `slots` against every live post, in chunks."""
+        matrix_t = self._matrix.T.tocsr()
+        for start in range(0, len(slots), CHUNK_ROWS):
+            chunk = slots[start:start + CHUNK_ROWS]
+            similarities = (self._matrix[chunk] @ matrix_t).tocsr()
+            for row, slot in enumerate(chunk):
+                lo, hi = similarities.indptr[row], similarities.indptr[row + 1]
+                cols, values = similarities.indices[lo:hi], similarities.data[lo:hi]
+                keep = self._alive[cols] & (cols != slot) & (values >= MIN_SCORE)
+                cols, values = cols[keep], values[keep]
+                if len(values) > TOP_K:
+                    best = np.argpartition(-values, TOP_K - 1)[:TOP_K]
+                    cols, values = cols[best], values[best]
+                order = np.argsort(-values)
+                self._neighbours[slot] = -1
+                self._scores[slot] = 0.0
+                self._neighbours[slot, :len(order)] = cols[order]
+                self._scores[slot, :len(order)] = values[order]
+
+    async def rebuild(self):
+        docs_ids, docs_counts, df = [], [], Counter()
+        watermark = None
+        async for blog in self.blogs.find({}, VECTOR_PROJECTION).batch_size(500):
+            counts = term_counts(blog)
+            docs_ids.append(str(blog["_id"]))
+            docs_counts.append(counts)
+            df.update(counts.keys())
+            if blog.get("updated_at") and (watermark is None or blog["updated_at"] > watermark):
+                watermark = blog["updated_at"]
+
+        total = len(docs_ids)
+        terms = [term for term, n in df.items() if total < 10 or n <= MAX_DF_RATIO * total]
+        self._vocab = {term: col for col, term in enumerate(terms)}
+        self._idf = np.array([math.log((1 + total) / (1 + df[term])) + 1 for term in terms], dtype=np.float32)
+        self._matrix = self._vectorize(docs_counts)
+        self._ids = docs_ids
+        self._slot_of = {blog_id: slot for slot, blog_id in enumerate(docs_ids)}
+        self._alive = np.ones(total, dtype=bool)
+        self._neighbours = np.full((total, TOP_K), -1, dtype=np.int64)
+        self._scores = np.zeros((total, TOP_K), dtype=np.float32)
+
+        self._top_k(np.arange(total))
+        computed_at = await self._persist(np.arange(total))
+        # Entries not rewritten by this rebuild belong to posts deleted while no worker was running.
+        await self.collection.delete_many({"computed_at": {"$lt": computed_at}})
+        self.watermark = watermark
+        self.ready = True
+
+    async def _live_ids(self) -> Set[str]:
+        # Covered by the _id index.
+        cursor = self.blogs.find({}, {"_id": 1}).hint([("_id", 1)]).batch_size(10000)
+        return {str(blog["_id"]) async for blog in cursor}
+
+    async def _fetch(self, blog_ids: Iterable[str]) -> List[dict]:
+        ids = [ObjectId(blog_id) for blog_id in blog_ids]
+        found = []
+        for start in range(0, len(ids), WRITE_BATCH_SIZE):
+            chunk = ids[start:start + WRITE_BATCH_SIZE]
+            found += await self.blogs.find({"_id": {"$in": chunk}}, VECTOR_PROJECTION).to_list(None)
+        return found
+
+    async def refresh(self):
+        """Re-vectorize edited, added and deleted posts since the last pass, then patch neighbours."""
+        live = await self._live_ids()
+        deleted = set(self._slot_of) - live
+        added = live - set(self._slot_of)
+        tombstones = len(self._ids) - len(self._slot_of) + len(deleted)
+        if max(len(added), tombstones) > REBUILD_RATIO * max(len(self._ids), 1000):
+            # Large imports would otherwise be scored against a stale vocabulary and IDF.
+            await self.rebuild()
+            return
+
+        query = {"updated_at": {"$gt": self.watermark}} if self.watermark else {}
+        changed = await self.blogs.find(query, VECTOR_PROJECTION).to_list(None)
+        changed += await self._fetch(added - {str(blog["_id"]) for blog in changed})
+        if not changed and not deleted:
+            return
+
+        dead_slots = [self._slot_of.pop(blog_id) for blog_id in
+                      deleted | {str(blog["_id"]) for blog in changed} if blog_id in self._slot_of]
+        self._alive[dead_slots] = False
+        for slot in dead_slots:
+            self._ids[slot] = None
+
+        first = len(self._ids)
+        if changed:
+            self._matrix = sparse.vstack([self._matrix, self._vectorize([term_counts(b) for b in changed])]).tocsr()
+            for blog in changed:
+                self._slot_of[str(blog["_id"])] = len(self._ids)
+                self._ids.append(str(blog["_id"]))
+            self._alive = np.concatenate([self._alive, np.ones(len(changed), dtype=bool)])
+            self._neighbours = np.vstack([self._neighbours, np.full((len(changed), TOP_K), -1, dtype=np.int64)])
+            self._scores = np.vstack([self._scores, np.zeros((len(changed), TOP_K), dtype=np.float32)])
+        new_slots = np.arange(first, len(self._ids))
+
+        # Posts that pointed at a dead slot, or that a new vector now beats their K-th neighbour.
+        affected = set(np.flatnonzero(np.isin(self._neighbours, dead_slots).any(axis=1)).tolist())
+        if len(new_slots):
+            similarities = (self._matrix[new_slots] @ self._matrix.T).tocsr()
+            kth = self._scores[:, TOP_K - 1]
+            hits = similarities.indices[similarities.data >= np.maximum(kth[similarities.indices], MIN_SCORE)]
+            affected.update(hits.tolist())
+        affected = np.array(sorted(slot for slot in affected if self._alive[slot] and slot < first), dtype=np.int64)
+
+        recompute = np.concatenate([new_slots, affected]).astype(np.int64)
+        self._top_k(recompute)
+        await self._persist(recompute, deleted_ids=deleted)
+        stamps = [blog["updated_at"] for blog in changed if blog.get("updated_at")]
+        if stamps:
+            self.watermark = max(stamps + [self.watermark] if self.watermark else stamps)
+
+    async def _persist(self, slots: np.ndarray, deleted_ids: Iterable[str] = ()) -> datetime:
+        now = datetime.utcnow()
+        operations = [DeleteOne({"_id": ObjectId(blog_id)}) for blog_id in deleted_ids]
+        for slot in slots.tolist():
+            related = [
+                {"id": self._ids[n], "score": round(float(score), 4)}
+                for n, score in zip(self._neighbours[slot].tolist(), self._scores[slot].tolist())
+                if n >= 0 and self._ids[n] is not None
+            ]
+            operations.append(UpdateOne(
+                {"_id": ObjectId(self._ids[slot])},
+                {"$set": {"related": related, "computed_at": now}},
+                upsert=True,
+            ))
+        for start in range(0, len(operations), WRITE_BATCH_SIZE):
+            await self.collection.bulk_write(operations[start:start + WRITE_BATCH_SIZE], ordered=False)
+        return now
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "posts": len(self._slot_of),
+            "slots": len(self._ids),
+            "vocabulary": len(self._vocab),
+            "nnz": int(self._matrix.nnz),
+        }
+
+
+async def maintain_related(related: RelatedPosts):
+    await related.rebuild()
+    logger.info("Rebuilt related posts: %s", related.stats())
+    while True:
+        await asyncio.sleep(REFRESH_INTERVAL_SECONDS)
+        try:
+            await related.refresh()
+        except Exception:
+            logger.exception("Failed to refresh related posts")
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute related posts into the related_posts collection.")
+    parser.add_argument("--once", action="store_true", help="rebuild once and exit instead of refreshing")
+    args = parser.parse_args(argv)
+
+    from database import blogs_collection, close, connect, related_posts_collection
+
+    connect()
+    try:
+        related = RelatedPosts(related_posts_collection, blogs_collection)
+        if args.once:
+            await related.rebuild()
+            print(f"Rebuilt related posts: {related.stats()}")
+        else:
+            await maintain_related(related)
+    finally:
+        close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Markdown rendered to HTML once at write time and stored on the post as `html` and `toc`,
+so readers (`GET /api/blogs/{id}?format=html`) don't parse markdown in the browser.
+
+Output is safe by construction: raw HTML in the markdown is escaped rather than passed
+through, and link/image URLs with script-capable schemes are dropped by the parser.
+`content_hash` records which body the stored HTML was rendered from; unchanged content is
+never rendered again. Render documents written before this with:
+    python rendering.py          # only documents missing rendered HTML
+    python rendering.py --all    # also re-render stale HTML (after a RENDER_VERSION bump)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import re
+from typing import List
+from markdown_it import MarkdownIt
+from pymongo import UpdateOne
+from cache import LRUCache
+
+# Bump when rendering output changes so stored HTML is re-rendered on the next write or backfill.
+RENDER_VERSION = 1
+RENDER_BATCH_SIZE = 200
+# Fields render_markdown produces; never accepted from clients.
+RENDERED_FIELDS = ("content_hash", "html", "toc")
+
+# CommonMark plus the GFM tables and strikethrough the client renders with remark-gfm.
+_markdown = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+
+# Recently rendered bodies, keyed by content hash.
+render_cache = LRUCache(max_bytes=16 * 1024 * 1024, ttl=3600)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(f"{RENDER_VERSION}\0{content}".encode("utf-8")).hexdigest()
+
+
+def slugify(text: str) -> str:
+    slug = re.sub(r"[^\w\s-]", "", text.lower()).strip()
+    return re.sub(r"\s+", "-", slug) or "section"
+
+
+def _anchor_headings(tokens) -> List[dict]:
+    toc = []
+    seen = {}
+    for i, token in enumerate(tokens):
+        if token.type != "heading_open":
+            continue
+        text = "".join(child.content for child in tokens[i + 1].children or [] if child.type in ("text", "code_inline"))
+        slug = slugify(text)
+        if slug in seen:
+            seen[slug] += 1
+            slug = f"{slug}-{seen[slug]}"
+        else:
+            seen[slug] = 0
+        token.attrSet("id", slug)
+        toc.append({"level": int(token.tag[1]), "text": text, "id": slug})
+    return toc
+
+
+def render_markdown(content: str) -> dict:
+    """Return the stored render fields for a markdown body: content_hash, html and toc."""
+    digest = content_hash(content)
+    rendered = render_cache.get(digest)
+    if rendered is None:
+        tokens = _markdown.parse(content)
+        toc = _anchor_headings(tokens)
+        for token in tokens:
+            for child in token.children or []:
+                if child.type == "link_open":
+                    child.attrSet("rel", "nofollow noopener")
+        rendered = {"content_hash": digest, "html": _markdown.renderer.render(tokens, _markdown.options, {}), "toc": toc}
+        render_cache.set(digest, rendered)
+    return rendered
+
+
+def is_rendered(blog: dict) -> bool:
+    return "html" in blog and blog.get("content_hash") == content_hash(blog.get("content", ""))
+
+
+async def backfill(collection, rerender_all: bool = False) -> int:
+    query = {} if rerender_all else {"html": {"$exists": False}}
+    updated = 0
+    batch = []
+    async for blog in collection.find(query, {"content": 1, "content_hash": 1, "html": 1}):
+        if is_rendered(blog):
+            continue
+        batch.append(UpdateOne({"_id": blog["_id"]}, {"$set": render_markdown(blog.get("content", ""))}))
+        if len(batch) >= RENDER_BATCH_SIZE:
+            updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+    return updated
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render stored blog markdown to HTML.")
+    parser.add_argument("--all", action="store_true", help="check every blog, not only those without HTML")
+    args = parser.parse_args(argv)
+
+    from database import blogs_collection, close, connect
+
+    connect()
+    try:
+        updated = await backfill(blogs_collection, rerender_all=args.all)
+    finally:
+        close()
+    print(f"Rendered {updated} blogs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
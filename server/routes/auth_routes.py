@@ -1,37 +1,44 @@
 from fastapi import APIRouter, HTTPException, status
-from database import users_collection
-from models import UserCreate, UserLogin, UserResponse
-from auth import hash_password, verify_password, create_access_token
+from pymongo.errors import DuplicateKeyError
+from routing import primary_users
+from models import AuthResponse, UserCreate, UserLogin
+from indexes import EMAIL_COLLATION
+from auth import hash_password_async, verify_password_async, create_access_token
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
-@router.post("/signup")
+@router.post("/signup", response_model=AuthResponse)
 async def signup(user: UserCreate):
-    existing = await users_collection.find_one({"email": user.email})
+    email = user.email.lower()
+    existing = await primary_users.find_one({"email": email}, collation=EMAIL_COLLATION)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed = hash_password(user.password)
-    result = await users_collection.insert_one({
-        "name": user.name,
-        "email": user.email,
-        "password": hashed,
-    })
+    hashed = await hash_password_async(user.password)
+    try:
+        result = await primary_users.insert_one({
+            "name": user.name,
+            "email": email,
+            "password": hashed,
+        })
+    except DuplicateKeyError:
+        # A concurrent signup for the same email won the race on the unique email index.
+        raise HTTPException(status_code=400, detail="Email already registered")
 
-    token = create_access_token({"user_id": str(result.inserted_id), "email": user.email, "name": user.name})
+    token = create_access_token({"user_id": str(result.inserted_id), "email": email, "name": user.name})
 
     return {
         "message": "User created successfully",
         "token": token,
-        "user": {"id": str(result.inserted_id), "name": user.name, "email": user.email}
+        "user": {"id": str(result.inserted_id), "name": user.name, "email": email}
     }
 
 
-@router.post("/login")
+@router.post("/login", response_model=AuthResponse)
 async def login(user: UserLogin):
-    db_user = await users_collection.find_one({"email": user.email})
-    if not db_user or not verify_password(user.password, db_user["password"]):
+    db_user = await primary_users.find_one({"email": user.email.lower()}, collation=EMAIL_COLLATION)
+    if not db_user or not await verify_password_async(user.password, db_user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     token = create_access_token({
@@ -1,96 +1,473 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime
-from database import blogs_collection
-from models import BlogCreate, BlogUpdate, BlogResponse
-from auth import get_current_user
-from typing import List
+from database import blogs_collection, related_posts_collection, reader_sketches_collection
+from models import (
+    BlogBatch, BlogCreate, BlogPage, BlogResponse, BlogUpdate, MessageResponse, RelatedBlogs, RenderedBlogResponse,
+    SearchResults, Suggestions, TrendingBlogs, UniqueReaders,
+)
+from auth import get_current_user, decode_token
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page
+from routing import CAUSAL_HEADER, MAX_STALENESS_SECONDS, blog_reads, blog_writes, read_session, write_session
+from summaries import LIST_PROJECTION, summarize
+from cache import LRUCache
+from singleflight import SingleFlight
+from search import SearchIndex, highlight
+from tags import tag_counts
+from suggest import PrefixIndex
+from counters import ViewCounter
+from trending import TrendingFeed, trend_stages
+from readers import ReaderSketches, current_windows
+from fields import DEFAULT_FIELDS, fields_key, fields_projection, has_counters, html_fields, parse_fields
+from rendering import RENDERED_FIELDS, content_hash, render_markdown
+from http_cache import (
+    BLOG_CACHE_CONTROL, FEED_CACHE_CONTROL, etag_matches, make_etag, not_modified, set_validators,
+)
+from typing import FrozenSet, List, Optional, Union
+import os
 
 router = APIRouter(prefix="/api/blogs", tags=["blogs"])
 
+MAX_BATCH_IDS = 100
+# Declared in indexes.py; hinted so single-post revalidation is covered by the index.
+VALIDATOR_INDEX = "_id_1_updated_at_1"
 
-def blog_to_response(blog: dict) -> dict:
+blog_cache = LRUCache(
+    max_bytes=int(os.getenv("BLOG_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl=float(os.getenv("BLOG_CACHE_TTL_SECONDS", "300")),
+)
+blog_flights = SingleFlight()
+# Posts this worker changed recently; their cache fills read the primary so a lagging secondary can't re-cache
+# the old version.
+recently_written = LRUCache(max_bytes=1024 * 1024, ttl=MAX_STALENESS_SECONDS, sizeof=lambda value: 64)
+page_flights = SingleFlight()
+search_index = SearchIndex()
+title_suggestions = PrefixIndex()
+
+
+def apply_flushed_views(views: dict):
+    for blog_id, n in views.items():
+        # Flushed views leave view_counter.pending; carry them onto the cached copy so its count doesn't drop.
+        blog = blog_cache.peek(blog_id)
+        if blog is not None:
+            blog["views"] = blog.get("views", 0) + n
+        # Title suggestions are ranked by views; keep their weights in step with the persisted counts.
+        title_suggestions.add_weight(blog_id, n)
+
+
+view_counter = ViewCounter(
+    blogs_collection,
+    interval=float(os.getenv("VIEW_FLUSH_INTERVAL_SECONDS", "5")),
+    threshold=int(os.getenv("VIEW_FLUSH_THRESHOLD", "1000")),
+    extra_stages=trend_stages,
+    on_flush=apply_flushed_views,
+)
+reader_sketches = ReaderSketches(
+    reader_sketches_collection,
+    blogs_collection,
+    interval=float(os.getenv("READER_FLUSH_INTERVAL_SECONDS", "10")),
+)
+
+
+RESPONSE_FIELDS = {
+    "id": lambda blog, summary: str(blog["_id"]),
+    "title": lambda blog, summary: blog["title"],
+    "excerpt": lambda blog, summary: summary.get("excerpt", ""),
+    "word_count": lambda blog, summary: summary.get("word_count", 0),
+    "reading_time": lambda blog, summary: summary.get("reading_time", 1),
+    "author": lambda blog, summary: blog["author"],
+    "author_id": lambda blog, summary: blog["author_id"],
+    "tags": lambda blog, summary: blog.get("tags", []),
+    "views": lambda blog, summary: view_counter.count(blog),
+    "unique_readers": lambda blog, summary: blog.get("unique_readers", 0),
+    "created_at": lambda blog, summary: blog["created_at"],
+    "updated_at": lambda blog, summary: blog["updated_at"],
+    "content": lambda blog, summary: blog["content"],
+    "html": lambda blog, summary: rendered(blog)["html"],
+    "toc": lambda blog, summary: rendered(blog).get("toc", []),
+}
+
+
+def rendered(blog: dict) -> dict:
+    # Posts stored before rendering was added are rendered on read (memoized by content hash).
+    return blog if "html" in blog else render_markdown(blog.get("content", ""))
+
+
+def blog_to_response(blog: dict, fields: Optional[FrozenSet[str]] = None) -> dict:
+    """Serialize a blog; `fields` (see fields.parse_fields) limits the response to those keys."""
+    # Documents written before summaries were stored fall back to computing them here.
+    summary = summarize(blog["content"]) if "excerpt" not in blog and "content" in blog else blog
+    if fields is None:
+        fields = DEFAULT_FIELDS | {"content"} if "content" in blog else DEFAULT_FIELDS
+    return {name: serialize(blog, summary) for name, serialize in RESPONSE_FIELDS.items() if name in fields}
+
+
+trending_feed = TrendingFeed(blogs_collection, LIST_PROJECTION, blog_to_response)
+
+
+async def load_blog(blog_id: str, fields: Optional[FrozenSet[str]] = None, collection=None,
+                    session=None) -> Optional[dict]:
+    if fields or session is not None:
+        # Partial documents and causal reads bypass the cache, which only holds whole, shared posts.
+        projection = fields_projection(fields, "updated_at") if fields else None
+        return await collection.find_one({"_id": ObjectId(blog_id)}, projection, session=session)
+
+    collection = blogs_collection if recently_written.get(blog_id) else blog_reads
+    blog = await collection.find_one({"_id": ObjectId(blog_id)})
+    # A write that lands while this query is in flight forgets the flight; don't cache the stale read.
+    if blog and blog_flights.is_current(blog_id):
+        blog_cache.set(blog_id, blog)
+    return blog
+
+
+async def load_page(cursor: Optional[str], limit: int, tag: Optional[str] = None,
+                    fields: Optional[FrozenSet[str]] = None, collection=blog_reads, session=None) -> tuple:
+    """(page, etag); the validator comes from the documents the page was built from."""
+    query = {"tags": tag} if tag else {}
+    # next_cursor is built from the last document's created_at; updated_at versions the page.
+    projection = fields_projection(fields, "created_at", "updated_at") if fields else LIST_PROJECTION
+    blogs, next_cursor = await fetch_page(collection, query, cursor, limit, projection, session=session)
+    page = {
+        "blogs": [blog_to_response(blog, fields) for blog in blogs],
+        "next_cursor": next_cursor,
+    }
+    return page, page_etag(blogs, next_cursor, cursor, limit, tag, fields)
+
+
+def blog_etag(blog: dict, fields: Optional[FrozenSet[str]] = None) -> str:
+    return make_etag(blog["_id"], blog["updated_at"].isoformat(), fields_key(fields), counters=has_counters(fields))
+
+
+def page_etag(blogs: List[dict], next_cursor: Optional[str], cursor: Optional[str], limit: int,
+              tag: Optional[str] = None, fields: Optional[FrozenSet[str]] = None) -> str:
+    # Hashing the page's own (_id, updated_at) pairs ties the validator to the member that served the body: a
+    # separate validator query could hit a fresher secondary and label a lagging page with the newer ETag.
+    # Edits change updated_at, and inserts and deletes change which ids the page holds.
+    versions = ",".join(f"{blog['_id']}@{blog['updated_at'].isoformat()}" for blog in blogs)
+    return make_etag(versions, next_cursor, cursor, limit, tag, fields_key(fields), counters=has_counters(fields))
+
+
+def reader_identity(request: Request) -> str:
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            return "u:" + decode_token(authorization[7:])["user_id"]
+        except (HTTPException, KeyError):
+            pass
+    forwarded = request.headers.get("x-forwarded-for", "").split(",")[0].strip()
+    client = forwarded or (request.client.host if request.client else "")
+    return f"a:{client}:{request.headers.get('user-agent', '')}"
+
+
+def record_read(blog_id: str, request: Request):
+    view_counter.record(blog_id)
+    reader_sketches.record(blog_id, reader_identity(request))
+
+
+def sparse_response(content: dict, response: Optional[Response] = None) -> ORJSONResponse:
+    # A client-chosen subset of fields can't satisfy the typed response model, so it is rendered as is.
+    return ORJSONResponse(content, headers=dict(response.headers) if response else None)
+
+
+def set_blog_validators(response: Response, etag: str, cache_control: str):
+    set_validators(response, etag, cache_control)
+    # A request carrying a causal token must not be answered from a copy cached before the write.
+    response.headers["Vary"] = CAUSAL_HEADER
+
+
+def invalidate_blog(blog_id: str):
+    recently_written.set(blog_id, True)
+    blog_cache.invalidate(blog_id)
+    blog_flights.forget(blog_id)
+    page_flights.clear()
+
+
+@router.get("", response_model=BlogPage)
+async def get_all_blogs(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    tag: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields)
+    async with read_session(request) as (blogs, session):
+        if session is None:
+            page, etag = await page_flights.do(
+                (cursor, limit, tag, fields_key(selected)), lambda: load_page(cursor, limit, tag, selected)
+            )
+        else:
+            # The caller just wrote: read through its own session rather than join a shared flight.
+            page, etag = await load_page(cursor, limit, tag, selected, blogs, session)
+    # A match still saves sending the body; the page itself is an index-ordered keyset read without content.
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, FEED_CACHE_CONTROL)
+    set_blog_validators(response, etag, FEED_CACHE_CONTROL)
+    return sparse_response(page, response) if selected else page
+
+
+@router.get("/search", response_model=SearchResults)
+async def search_blogs(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields)
+    if not search_index.ready:
+        raise HTTPException(status_code=503, detail="Search index is still building", headers={"Retry-After": "5"})
+
+    hits, total = search_index.search(q, limit, offset)
+    if not hits:
+        return {"results": [], "total": total}
+
+    ids = [ObjectId(blog_id) for blog_id, _ in hits]
+    # The snippet needs the body even when the response itself leaves it out.
+    projection = fields_projection(selected, "content") if selected else {"html": 0, "toc": 0}
+    async with read_session(request) as (blogs, session):
+        found = await blogs.find({"_id": {"$in": ids}}, projection, session=session).to_list(len(ids))
+    docs = {str(doc["_id"]): doc for doc in found}
+    results = []
+    for blog_id, score in hits:
+        doc = docs.get(blog_id)
+        if doc is None:
+            continue
+        result = blog_to_response(doc, selected)
+        if selected is None:
+            result.pop("content", None)
+        result["snippet"] = highlight(doc.get("content", ""), q)
+        result["score"] = round(score, 4)
+        results.append(result)
+    matches = {"results": results, "total": total}
+    return sparse_response(matches) if selected else matches
+
+
+@router.get("/trending", response_model=TrendingBlogs)
+async def get_trending_blogs(response: Response, limit: int = Query(20, ge=1, le=100)):
+    response.headers["Cache-Control"] = FEED_CACHE_CONTROL
+    return {"blogs": trending_feed.top(limit)}
+
+
+@router.get("/suggest", response_model=Suggestions)
+async def suggest(prefix: str = Query(..., min_length=1, max_length=100), limit: int = Query(8, ge=1, le=20)):
     return {
-        "id": str(blog["_id"]),
-        "title": blog["title"],
-        "content": blog["content"],
-        "excerpt": blog["content"][:100] + "..." if len(blog["content"]) > 100 else blog["content"],
-        "author": blog["author"],
-        "author_id": blog["author_id"],
-        "tags": blog.get("tags", []),
-        "created_at": blog["created_at"],
-        "updated_at": blog["updated_at"],
+        "titles": [{"id": s["ref"], "title": s["label"]} for s in title_suggestions.suggest(prefix, limit)],
+        "tags": [{"tag": s["label"], "count": int(s["weight"])} for s in tag_counts.suggestions.suggest(prefix, limit)],
     }
 
 
-@router.get("")
-async def get_all_blogs():
-    blogs = await blogs_collection.find().sort("created_at", -1).to_list(100)
-    return [blog_to_response(blog) for blog in blogs]
+@router.get("/batch", response_model=BlogBatch)
+async def get_blogs_batch(request: Request, ids: str = Query(..., min_length=1), fields: Optional[str] = None):
+    selected = parse_fields(fields)
+    requested = list(dict.fromkeys(blog_id.strip() for blog_id in ids.split(",") if blog_id.strip()))
+    invalid = [blog_id for blog_id in requested if not ObjectId.is_valid(blog_id)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid blog IDs: {', '.join(invalid[:10])}")
+    if len(requested) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+
+    found = {}
+    async with read_session(request) as (blogs, session):
+        for blog_id in requested if session is None else []:
+            blog = blog_cache.get(blog_id)
+            if blog is not None:
+                found[blog_id] = blog
+        misses = [ObjectId(blog_id) for blog_id in requested if blog_id not in found]
+        if misses:
+            projection = fields_projection(selected) if selected else None
+            cursor = blogs.find({"_id": {"$in": misses}}, projection, session=session)
+            for blog in await cursor.to_list(len(misses)):
+                found[str(blog["_id"])] = blog
+                if selected is None and session is None and not recently_written.get(str(blog["_id"])):
+                    blog_cache.set(str(blog["_id"]), blog)
+
+    batch = {
+        "blogs": [blog_to_response(found[blog_id], selected) for blog_id in requested if blog_id in found],
+        "missing": [blog_id for blog_id in requested if blog_id not in found],
+    }
+    return sparse_response(batch) if selected else batch
 
 
-@router.get("/{blog_id}")
-async def get_blog(blog_id: str):
+@router.get("/{blog_id}", response_model=Union[BlogResponse, RenderedBlogResponse])
+async def get_blog(
+    blog_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    format: str = Query("markdown", pattern="^(markdown|html)$"),
+):
     if not ObjectId.is_valid(blog_id):
         raise HTTPException(status_code=400, detail="Invalid blog ID")
+    selected = parse_fields(fields)
+    shape = html_fields(selected) if format == "html" else selected
 
-    blog = await blogs_collection.find_one({"_id": ObjectId(blog_id)})
+    if_none_match = request.headers.get("if-none-match")
+    async with read_session(request) as (blogs, session):
+        blog = blog_cache.get(blog_id) if session is None else None
+        if blog is None and if_none_match:
+            # Revalidation only needs updated_at. The hint makes it a covered query on (_id, updated_at); a plain
+            # _id lookup would take the _id fast path and fetch the whole document.
+            stamp = await blogs.find_one(
+                {"_id": ObjectId(blog_id)}, {"_id": 1, "updated_at": 1}, hint=VALIDATOR_INDEX, session=session
+            )
+            if not stamp:
+                raise HTTPException(status_code=404, detail="Blog not found")
+            if etag_matches(if_none_match, blog_etag(stamp, shape)):
+                record_read(blog_id, request)
+                return not_modified(blog_etag(stamp, shape), BLOG_CACHE_CONTROL)
+
+        if blog is None and (selected or session is not None):
+            blog = await load_blog(blog_id, shape if selected else None, blogs, session)
+        elif blog is None:
+            blog = await blog_flights.do(blog_id, lambda: load_blog(blog_id))
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
 
-    return blog_to_response(blog)
+    record_read(blog_id, request)
+    etag = blog_etag(blog, shape)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, BLOG_CACHE_CONTROL)
+
+    set_blog_validators(response, etag, BLOG_CACHE_CONTROL)
+    body = blog_to_response(blog, shape)
+    return sparse_response(body, response) if selected else body
+
 
+async def raise_write_failure(blog_id: str, action: str):
+    # Only reached when the conditional write matched nothing: tell "missing" from "not yours".
+    if await blogs_collection.find_one({"_id": ObjectId(blog_id)}, {"_id": 1}):
+        raise HTTPException(status_code=403, detail=f"Not authorized to {action} this blog")
+    raise HTTPException(status_code=404, detail="Blog not found")
 
-@router.post("")
-async def create_blog(blog: BlogCreate, current_user: dict = Depends(get_current_user)):
+
+def utcnow() -> datetime:
+    # MongoDB stores milliseconds; truncate so the returned document matches what is persisted.
     now = datetime.utcnow()
-    result = await blogs_collection.insert_one({
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+@router.get("/{blog_id}/related", response_model=RelatedBlogs)
+async def get_related_blogs(blog_id: str, limit: int = Query(5, ge=1, le=20)):
+    if not ObjectId.is_valid(blog_id):
+        raise HTTPException(status_code=400, detail="Invalid blog ID")
+
+    entry = await related_posts_collection.find_one({"_id": ObjectId(blog_id)})
+    related = (entry or {}).get("related", [])[:limit]
+    if not related:
+        return {"related": []}
+
+    ids = [ObjectId(item["id"]) for item in related]
+    found = await blogs_collection.find({"_id": {"$in": ids}}, LIST_PROJECTION).to_list(len(ids))
+    docs = {str(doc["_id"]): doc for doc in found}
+    results = []
+    for item in related:
+        if item["id"] in docs:
+            results.append({**blog_to_response(docs[item["id"]]), "score": item["score"]})
+    return {"related": results}
+
+
+@router.get("/{blog_id}/readers", response_model=UniqueReaders)
+async def get_unique_readers(blog_id: str):
+    if not ObjectId.is_valid(blog_id):
+        raise HTTPException(status_code=400, detail="Invalid blog ID")
+
+    day, week, total = [window for window, _ in current_windows(datetime.utcnow())]
+    counts = (await reader_sketches.estimates([blog_id], [day, week, total]))[blog_id]
+    return {"today": counts[day], "this_week": counts[week], "all_time": counts[total]}
+
+
+@router.post("", response_model=BlogResponse)
+async def create_blog(blog: BlogCreate, response: Response, current_user: dict = Depends(get_current_user)):
+    now = utcnow()
+    document = {
         "title": blog.title,
         "content": blog.content,
         "tags": blog.tags,
+        **summarize(blog.content),
+        **render_markdown(blog.content),
         "author": current_user["name"],
         "author_id": current_user["user_id"],
         "created_at": now,
         "updated_at": now,
-    })
+    }
+    async with write_session(response) as session:
+        await blog_writes.insert_one(document, session=session)
+    page_flights.clear()
+    search_index.add(document)
+    title_suggestions.upsert(str(document["_id"]), document["title"])
+    await tag_counts.apply([], blog.tags)
 
-    created = await blogs_collection.find_one({"_id": result.inserted_id})
-    return blog_to_response(created)
+    return blog_to_response(document)
 
 
-@router.put("/{blog_id}")
-async def update_blog(blog_id: str, blog: BlogUpdate, current_user: dict = Depends(get_current_user)):
-    if not ObjectId.is_valid(blog_id):
-        raise HTTPException(status_code=400, detail="Invalid blog ID")
+def update_stage(update_data: dict) -> dict:
+    """$set stage for a pipeline update; a new body keeps the stored HTML only if it hashes the same."""
+    fields = {name: {"$literal": value} for name, value in update_data.items()}
+    if "content" in update_data:
+        unchanged = {"$eq": ["$content_hash", content_hash(update_data["content"])]}
+        fields.update({name: {"$cond": [unchanged, f"${name}", "$$REMOVE"]} for name in RENDERED_FIELDS})
+    return {"$set": fields}
 
-    existing = await blogs_collection.find_one({"_id": ObjectId(blog_id)})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Blog not found")
 
-    if existing["author_id"] != current_user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update this blog")
+@router.put("/{blog_id}", response_model=BlogResponse)
+async def update_blog(
+    blog_id: str, blog: BlogUpdate, response: Response, current_user: dict = Depends(get_current_user)
+):
+    if not ObjectId.is_valid(blog_id):
+        raise HTTPException(status_code=400, detail="Invalid blog ID")
 
     update_data = {k: v for k, v in blog.model_dump().items() if v is not None}
-    update_data["updated_at"] = datetime.utcnow()
+    if "content" in update_data:
+        update_data.update(summarize(update_data["content"]))
+    update_data["updated_at"] = utcnow()
 
-    await blogs_collection.update_one({"_id": ObjectId(blog_id)}, {"$set": update_data})
+    # The pre-image gives the old tags for the facet delta; $set is applied locally for the post-image.
+    async with write_session(response) as session:
+        previous = await blog_writes.find_one_and_update(
+            {"_id": ObjectId(blog_id), "author_id": current_user["user_id"]},
+            [update_stage(update_data)],
+            return_document=ReturnDocument.BEFORE,
+            session=session,
+        )
+        if not previous:
+            await raise_write_failure(blog_id, "update")
+        if "content" in update_data and previous.get("content_hash") != content_hash(update_data["content"]):
+            # Rendered only once the author check has passed; until this lands readers render on read.
+            rendered = render_markdown(update_data["content"])
+            await blog_writes.update_one(
+                {"_id": ObjectId(blog_id), "updated_at": update_data["updated_at"]}, {"$set": rendered}, session=session
+            )
+            update_data.update(rendered)
+    updated = {**previous, **update_data}
 
-    updated = await blogs_collection.find_one({"_id": ObjectId(blog_id)})
+    invalidate_blog(blog_id)
+    search_index.add(updated)
+    if "title" in update_data:
+        title_suggestions.upsert(blog_id, updated["title"], updated.get("views", 0))
+    await tag_counts.apply(previous.get("tags", []), updated.get("tags", []))
     return blog_to_response(updated)
 
 
-@router.delete("/{blog_id}")
-async def delete_blog(blog_id: str, current_user: dict = Depends(get_current_user)):
+@router.delete("/{blog_id}", response_model=MessageResponse)
+async def delete_blog(blog_id: str, response: Response, current_user: dict = Depends(get_current_user)):
     if not ObjectId.is_valid(blog_id):
         raise HTTPException(status_code=400, detail="Invalid blog ID")
 
-    existing = await blogs_collection.find_one({"_id": ObjectId(blog_id)})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Blog not found")
-
-    if existing["author_id"] != current_user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to delete this blog")
+    async with write_session(response) as session:
+        deleted = await blog_writes.find_one_and_delete(
+            {"_id": ObjectId(blog_id), "author_id": current_user["user_id"]},
+            projection={"tags": 1},
+            session=session,
+        )
+        if not deleted:
+            await raise_write_failure(blog_id, "delete")
 
-    await blogs_collection.delete_one({"_id": ObjectId(blog_id)})
+    invalidate_blog(blog_id)
+    search_index.remove(blog_id)
+    title_suggestions.remove(blog_id)
+    await tag_counts.apply(deleted.get("tags", []), [])
     return {"message": "Blog deleted successfully"}
-
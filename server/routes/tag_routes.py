@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Query
+from tags import tag_counts
+from models import TagList
+
+router = APIRouter(prefix="/api/tags", tags=["tags"])
+
+
+@router.get("", response_model=TagList)
+async def get_tags(limit: int = Query(50, ge=1, le=500)):
+    return {"tags": tag_counts.top(limit)}
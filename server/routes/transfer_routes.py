@@ -0,0 +1,96 @@
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pymongo.errors import BulkWriteError
+from database import blogs_collection
+from auth import get_admin_user
+from summaries import summarize
+from rendering import RENDERED_FIELDS, render_markdown
+from tags import tag_counts
+from models import ImportResult
+from transfer import IMPORT_BATCH_SIZE, TransferStats, decode, is_valid, iter_lines, stream_ndjson
+from routes.blog_routes import blog_cache, page_flights, search_index, title_suggestions
+
+# Declared on the blogs prefix; included before the blog router so /export isn't taken for a blog_id.
+router = APIRouter(prefix="/api/blogs", tags=["blogs"])
+
+export_stats = TransferStats()
+import_stats = TransferStats()
+
+
+@router.get("/export")
+async def export_blogs(gzip: bool = Query(False), current_user: dict = Depends(get_admin_user)):
+    cursor = blogs_collection.find({}).sort("_id", 1).batch_size(1000)
+    filename = "blogs.ndjson.gz" if gzip else "blogs.ndjson"
+    return StreamingResponse(
+        stream_ndjson(cursor, export_stats, gzip=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def insert_batch(batch: list) -> tuple:
+    """insert_many(ordered=False); duplicate _ids are skipped rather than failing the batch."""
+    try:
+        await blogs_collection.insert_many(batch, ordered=False)
+        inserted = batch
+    except BulkWriteError as exc:
+        failed = {error["index"] for error in exc.details["writeErrors"]}
+        if any(error["code"] != 11000 for error in exc.details["writeErrors"]):
+            raise
+        inserted = [doc for i, doc in enumerate(batch) if i not in failed]
+    for doc in inserted:
+        search_index.add(doc)
+        title_suggestions.upsert(str(doc["_id"]), doc["title"], doc.get("views", 0))
+    return len(inserted), len(batch) - len(inserted)
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_blogs(request: Request, current_user: dict = Depends(get_admin_user)):
+    gzip = request.headers.get("content-encoding", "").lower() == "gzip"
+    start = time.perf_counter()
+    received = 0
+    inserted = skipped = invalid = 0
+    batch = []
+
+    async def body():
+        nonlocal received
+        async for chunk in request.stream():
+            received += len(chunk)
+            yield chunk
+
+    try:
+        async for line in iter_lines(body(), gzip=gzip):
+            try:
+                doc = decode(line)
+            except ValueError:
+                invalid += 1
+                continue
+            if not is_valid(doc):
+                invalid += 1
+                continue
+            if "excerpt" not in doc:
+                doc.update(summarize(doc["content"]))
+            # Stored HTML is injected by the client as is, so it is only ever produced by our renderer:
+            # a matching content_hash is computable by anyone and proves nothing about incoming html.
+            for field in RENDERED_FIELDS:
+                doc.pop(field, None)
+            doc.update(render_markdown(doc["content"]))
+            batch.append(doc)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                added, duplicates = await insert_batch(batch)
+                inserted, skipped, batch = inserted + added, skipped + duplicates, []
+        if batch:
+            added, duplicates = await insert_batch(batch)
+            inserted, skipped = inserted + added, skipped + duplicates
+    except BulkWriteError as exc:
+        error = exc.details["writeErrors"][0]["errmsg"]
+        raise HTTPException(status_code=400, detail=f"Import failed after {inserted} posts: {error}")
+    finally:
+        if inserted:
+            blog_cache.clear()
+            page_flights.clear()
+            await tag_counts.rebuild(blogs_collection)
+        import_stats.record(inserted, received, time.perf_counter() - start, skipped=skipped, invalid=invalid)
+
+    return {"inserted": inserted, "skipped_duplicates": skipped, "invalid": invalid}
@@ -0,0 +1,96 @@
+"""
+Read/write routing across the replica set.
+
+- Blog reads go to secondaries (`secondaryPreferred`, bounded by READ_MAX_STALENESS_SECONDS),
+  so read throughput scales with the number of members.
+- Blog writes made by authors run in a causally consistent session with majority write
+  concern. The session's cluster/operation time is returned to the client as a signed
+  `X-Causal-Token`. When the client sends it back, reads run in a causal session (majority
+  read concern) that waits until the serving member has caught up with that write, and
+  they bypass the in-process caches, which may still hold the pre-write version.
+- Auth lookups stay on the primary: a just-created account must be able to log in at once.
+
+On a standalone server sessions carry no cluster time, so no token is issued and every read
+simply goes to the one node.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+import bson
+from fastapi import Request, Response
+from pymongo import ReadPreference
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+from auth import SECRET_KEY
+from database import blogs_collection, get_client, users_collection
+
+# The server rejects a bound below 90s (heartbeat interval + idle write period).
+MAX_STALENESS_SECONDS = max(90, int(os.getenv("READ_MAX_STALENESS_SECONDS", "90")))
+# How long after a write the author's reads stay causal; covers replica lag and other workers' blog caches.
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "300"))
+CAUSAL_HEADER = "X-Causal-Token"
+
+secondary_reads = SecondaryPreferred(max_staleness=MAX_STALENESS_SECONDS)
+
+blog_reads = blogs_collection.with_options(read_preference=secondary_reads)
+causal_blog_reads = blogs_collection.with_options(read_preference=secondary_reads, read_concern=ReadConcern("majority"))
+blog_writes = blogs_collection.with_options(write_concern=WriteConcern("majority"))
+primary_users = users_collection.with_options(read_preference=ReadPreference.PRIMARY)
+
+
+def _sign(payload: bytes) -> str:
+    return hmac.new(SECRET_KEY.encode("utf-8"), payload, hashlib.sha256).hexdigest()[:32]
+
+
+def encode_causal_token(session) -> Optional[str]:
+    if session.cluster_time is None or session.operation_time is None:
+        return None
+    payload = base64.urlsafe_b64encode(
+        bson.encode({"cluster_time": session.cluster_time, "operation_time": session.operation_time})
+    )
+    return f"{payload.decode('ascii')}.{_sign(payload)}"
+
+
+def decode_causal_token(token: Optional[str]) -> Optional[dict]:
+    """Verified, unexpired token contents, or None (tokens only ever make reads stricter, so bad ones are ignored)."""
+    if not token:
+        return None
+    payload, _, signature = token.encode("ascii", "ignore").partition(b".")
+    if not hmac.compare_digest(_sign(payload), signature.decode("ascii")):
+        return None
+    try:
+        decoded = bson.decode(base64.urlsafe_b64decode(payload))
+    except (ValueError, bson.errors.BSONError):
+        return None
+    if decoded["operation_time"].time < time.time() - READ_YOUR_WRITES_SECONDS:
+        return None
+    return decoded
+
+
+@asynccontextmanager
+async def write_session(response: Response):
+    """Session for an author's write; attaches the causal token to the response when the write succeeds."""
+    async with await get_client().start_session(causal_consistency=True) as session:
+        yield session
+        token = encode_causal_token(session)
+        if token:
+            response.headers[CAUSAL_HEADER] = token
+
+
+@asynccontextmanager
+async def read_session(request: Request):
+    """(collection, session) for blog reads: causal after the caller's own write, otherwise plain secondary reads."""
+    token = decode_causal_token(request.headers.get(CAUSAL_HEADER))
+    if token is None:
+        yield blog_reads, None
+        return
+    async with await get_client().start_session(causal_consistency=True) as session:
+        session.advance_cluster_time(token["cluster_time"])
+        session.advance_operation_time(token["operation_time"])
+        yield causal_blog_reads, session
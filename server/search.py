@@ -0,0 +1,186 @@
+"""
+In-process full-text index over blog title, tags and content with BM25 ranking.
+Postings are append-only typed arrays scored with NumPy; updates and deletes leave
+tombstones that are compacted away once they make up a large share of the index.
+"""
+
+import html
+import math
+import re
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with".split()
+)
+
+# Field weights folded into the term frequency (a simple BM25F).
+TITLE_BOOST = 3.0
+TAG_BOOST = 2.0
+CONTENT_BOOST = 1.0
+K1 = 1.2
+B = 0.75
+COMPACT_RATIO = 0.25
+SNIPPET_CHARS = 160
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    def __init__(self):
+        self.ready = False
+        self._reset()
+
+    def _reset(self):
+        self._postings: Dict[str, tuple] = {}
+        self._slot_of: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._versions: List[Optional[datetime]] = []
+        self._lengths = array("f")
+        self._alive = array("b")
+        self._live_count = 0
+        self._live_length = 0.0
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def add(self, blog: dict):
+        blog_id = str(blog["_id"])
+        version = blog.get("updated_at")
+        slot = self._slot_of.get(blog_id)
+        if slot is not None:
+            # The startup build can race a live write; never replace a newer version with an older one.
+            if version and self._versions[slot] and version < self._versions[slot]:
+                return
+            self._kill(slot)
+
+        weights: Dict[str, float] = {}
+        for boost, text in (
+            (TITLE_BOOST, blog.get("title", "")),
+            (TAG_BOOST, " ".join(blog.get("tags", []))),
+            (CONTENT_BOOST, blog.get("content", "")),
+        ):
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0.0) + boost
+
+        slot = len(self._ids)
+        self._ids.append(blog_id)
+        self._versions.append(version)
+        length = sum(weights.values())
+        self._lengths.append(length)
+        self._alive.append(1)
+        self._slot_of[blog_id] = slot
+        self._live_count += 1
+        self._live_length += length
+
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("f"))
+            postings[0].append(slot)
+            postings[1].append(weight)
+
+    def remove(self, blog_id: str):
+        slot = self._slot_of.pop(blog_id, None)
+        if slot is not None:
+            self._kill(slot)
+
+    def _kill(self, slot: int):
+        if self._alive[slot]:
+            self._alive[slot] = 0
+            self._live_count -= 1
+            self._live_length -= self._lengths[slot]
+        self._ids[slot] = None
+        if len(self._ids) - self._live_count > COMPACT_RATIO * max(len(self._ids), 1000):
+            self._compact()
+
+    def _compact(self):
+        alive = np.frombuffer(self._alive, dtype=np.int8).astype(bool)
+        remap = np.cumsum(alive) - 1
+        postings = {}
+        for term, (slots, weights) in self._postings.items():
+            slots_np = np.frombuffer(slots, dtype=np.uint32)
+            keep = alive[slots_np]
+            if keep.any():
+                postings[term] = (
+                    array("I", remap[slots_np[keep]].astype(np.uint32).tobytes()),
+                    array("f", np.frombuffer(weights, dtype=np.float32)[keep].tobytes()),
+                )
+        self._postings = postings
+        self._ids = [blog_id for blog_id in self._ids if blog_id is not None]
+        self._versions = [v for v, live in zip(self._versions, alive) if live]
+        self._lengths = array("f", np.frombuffer(self._lengths, dtype=np.float32)[alive].tobytes())
+        self._alive = array("b", [1]) * len(self._ids)
+        self._slot_of = {blog_id: slot for slot, blog_id in enumerate(self._ids)}
+
+    def search(self, query: str, limit: int = 10, offset: int = 0) -> tuple:
+        """Return ([(blog_id, score), ...], total_matches) for the BM25-ranked query."""
+        terms = set(tokenize(query))
+        if not terms or not self._live_count:
+            return [], 0
+
+        alive = np.frombuffer(self._alive, dtype=np.int8)
+        lengths = np.frombuffer(self._lengths, dtype=np.float32)
+        avg_length = self._live_length / self._live_count or 1.0
+        scores = np.zeros(len(self._ids), dtype=np.float32)
+        matched = np.zeros(len(self._ids), dtype=bool)
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            slots = np.frombuffer(postings[0], dtype=np.uint32)
+            live = alive[slots] == 1
+            slots = slots[live]
+            if not len(slots):
+                continue
+            tf = np.frombuffer(postings[1], dtype=np.float32)[live]
+            df = len(slots)
+            idf = math.log(1 + (self._live_count - df + 0.5) / (df + 0.5))
+            norm = K1 * (1 - B + B * lengths[slots] / avg_length)
+            # Each doc appears once per term's postings, so fancy-index += is safe here.
+            scores[slots] += idf * tf * (K1 + 1) / (tf + norm)
+            matched[slots] = True
+
+        candidates = np.flatnonzero(matched)
+        total = len(candidates)
+        wanted = offset + limit
+        if total > wanted:
+            candidates = candidates[np.argpartition(-scores[candidates], wanted - 1)[:wanted]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")][offset:wanted]
+        return [(self._ids[slot], float(scores[slot])) for slot in ranked], total
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "documents": self._live_count,
+            "slots": len(self._ids),
+            "terms": len(self._postings),
+            "postings": sum(len(slots) for slots, _ in self._postings.values()),
+        }
+
+
+def highlight(text: str, query: str, width: int = SNIPPET_CHARS) -> str:
+    """HTML-escaped snippet around the first query term, with matches wrapped in <mark>."""
+    terms = set(tokenize(query))
+    if not terms:
+        return html.escape(text[:width])
+    pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\b", re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, first.start() - width // 3) if first else 0
+    window = text[start:start + width]
+    snippet = pattern.sub(lambda m: f"\0{m.group(0)}\1", window)
+    snippet = html.escape(snippet).replace("\0", "<mark>").replace("\1", "</mark>")
+    return ("..." if start else "") + snippet + ("..." if start + width < len(text) else "")
+
+
+async def build_index(index: SearchIndex, collection, batch_size: int = 200):
+    cursor = collection.find({}, {"title": 1, "tags": 1, "content": 1, "updated_at": 1}).batch_size(batch_size)
+    async for blog in cursor:
+        index.add(blog)
+    index.ready = True
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight task.
+    The task runs independently of its callers, so one client disconnecting
+    does not cancel the query the other waiters are sharing.
+    """
+
+    def __init__(self):
+        self._calls: dict = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def is_current(self, key: Hashable) -> bool:
+        """True when called from the task still registered for `key` (i.e. not forgotten by a write)."""
+        return self._calls.get(key) is asyncio.current_task()
+
+    def forget(self, key: Hashable) -> None:
+        self._calls.pop(key, None)
+
+    def clear(self) -> None:
+        self._calls.clear()
+
+    def _release(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "executed": self.executed, "coalesced": self.coalesced}
@@ -0,0 +1,135 @@
+"""
+Typeahead over normalized titles and tags: a sorted key array searched with bisect,
+with popularity weights in a parallel NumPy array so the top-k of a prefix range is an
+argpartition rather than a scan. Writes land in a small pending buffer that is merged
+into the sorted arrays once it grows past MERGE_THRESHOLD.
+"""
+
+import re
+import sys
+import unicodedata
+from bisect import bisect_left
+from typing import Hashable, Iterable, List, Tuple
+import numpy as np
+
+MERGE_THRESHOLD = 1000
+NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return NON_ALNUM_RE.sub(" ", text.lower()).strip()
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._keys: List[str] = []
+        self._labels: List[str] = []
+        self._refs: List[Hashable] = []
+        self._weights = np.zeros(0, dtype=np.float64)
+        self._position: dict = {}
+        self._pending: dict = {}
+        self._dead = 0
+        self._memory_bytes = 0
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._keys) - self._dead + len(self._pending)
+
+    def build(self, entries: Iterable[Tuple[Hashable, str, float]]):
+        """Replace the index with (ref, label, weight) entries; writes made while loading them win."""
+        fresh = {ref: (normalize(label), label, float(weight)) for ref, label, weight in entries}
+        fresh.update(self._pending)
+        self._pending = fresh
+        self._keys, self._labels, self._refs = [], [], []
+        self._weights = np.zeros(0, dtype=np.float64)
+        self._position = {}
+        self._dead = 0
+        self._merge()
+        self.ready = True
+
+    def upsert(self, ref: Hashable, label: str, weight: float = 0.0):
+        self.remove(ref)
+        self._pending[ref] = (normalize(label), label, float(weight))
+        if len(self._pending) > MERGE_THRESHOLD:
+            self._merge()
+
+    def add_weight(self, ref: Hashable, delta: float):
+        """Bump an entry's popularity in place (e.g. flushed view increments); unknown refs are ignored."""
+        if ref in self._pending:
+            key, label, weight = self._pending[ref]
+            self._pending[ref] = (key, label, weight + delta)
+        elif ref in self._position:
+            self._weights[self._position[ref]] += delta
+
+    def remove(self, ref: Hashable):
+        self._pending.pop(ref, None)
+        position = self._position.pop(ref, None)
+        if position is not None:
+            self._weights[position] = -np.inf
+            self._dead += 1
+
+    def _merge(self):
+        live = [
+            (key, label, ref, weight)
+            for key, label, ref, weight in zip(self._keys, self._labels, self._refs, self._weights.tolist())
+            if weight != -np.inf
+        ]
+        live += [(key, label, ref, weight) for ref, (key, label, weight) in self._pending.items() if key]
+        live.sort(key=lambda entry: entry[0])
+
+        self._keys = [entry[0] for entry in live]
+        self._labels = [entry[1] for entry in live]
+        self._refs = [entry[2] for entry in live]
+        self._weights = np.array([entry[3] for entry in live], dtype=np.float64)
+        self._position = {ref: i for i, ref in enumerate(self._refs)}
+        self._pending = {}
+        self._dead = 0
+        self._memory_bytes = (
+            sum(sys.getsizeof(key) for key in self._keys)
+            + sum(sys.getsizeof(label) for label in self._labels if label is not None)
+            # Tag indexes use the label itself as the ref; don't count the shared string twice.
+            + sum(sys.getsizeof(ref) for ref, label in zip(self._refs, self._labels) if ref is not label)
+            + sys.getsizeof(self._keys) + sys.getsizeof(self._labels) + sys.getsizeof(self._refs)
+            + self._weights.nbytes + sys.getsizeof(self._position)
+            + sum(sys.getsizeof(position) for position in self._position.values())
+        )
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        key = normalize(prefix)
+        if not key:
+            return []
+        lo = bisect_left(self._keys, key)
+        hi = bisect_left(self._keys, key + "\x7f", lo)
+
+        weights = self._weights[lo:hi]
+        if hi - lo > limit:
+            top = np.argpartition(-weights, limit - 1)[:limit]
+        else:
+            top = np.arange(hi - lo)
+        candidates = [
+            (float(weights[i]), self._keys[lo + i], self._labels[lo + i], self._refs[lo + i])
+            for i in top if weights[i] != -np.inf
+        ]
+        candidates += [
+            (weight, entry_key, label, ref)
+            for ref, (entry_key, label, weight) in self._pending.items() if entry_key.startswith(key)
+        ]
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+        return [{"label": label, "ref": ref, "weight": weight} for weight, _, label, ref in candidates[:limit]]
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "entries": len(self),
+            "pending": len(self._pending),
+            "tombstones": self._dead,
+            "memory_bytes": self._memory_bytes,
+        }
+
+
+async def build_title_index(index: PrefixIndex, collection, batch_size: int = 1000):
+    entries = []
+    async for blog in collection.find({}, {"title": 1, "views": 1}).batch_size(batch_size):
+        entries.append((str(blog["_id"]), blog["title"], float(blog.get("views", 0))))
+    index.build(entries)
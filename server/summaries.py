@@ -0,0 +1,60 @@
+"""
+Summary fields stored on each blog at write time so list responses never need `content`.
+Backfill existing documents with:
+    python summaries.py          # only documents missing summary fields
+    python summaries.py --all    # recompute every document
+"""
+
+import argparse
+import asyncio
+import math
+from pymongo import UpdateOne
+
+EXCERPT_LENGTH = 100
+WORDS_PER_MINUTE = 200
+BACKFILL_BATCH_SIZE = 500
+
+# Projection for list responses: everything except the markdown body and its rendered HTML.
+LIST_PROJECTION = {"content": 0, "html": 0, "toc": 0}
+
+
+def summarize(content: str) -> dict:
+    word_count = len(content.split())
+    return {
+        "excerpt": content[:EXCERPT_LENGTH] + "..." if len(content) > EXCERPT_LENGTH else content,
+        "word_count": word_count,
+        "reading_time": max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+    }
+
+
+async def backfill(collection, recompute_all: bool = False) -> int:
+    query = {} if recompute_all else {"excerpt": {"$exists": False}}
+    updated = 0
+    batch = []
+    async for blog in collection.find(query, {"content": 1}):
+        batch.append(UpdateOne({"_id": blog["_id"]}, {"$set": summarize(blog.get("content", ""))}))
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+    return updated
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill stored blog summary fields.")
+    parser.add_argument("--all", action="store_true", help="recompute summaries for every blog")
+    args = parser.parse_args(argv)
+
+    from database import blogs_collection, close, connect
+
+    connect()
+    try:
+        updated = await backfill(blogs_collection, recompute_all=args.all)
+    finally:
+        close()
+    print(f"Updated {updated} blogs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
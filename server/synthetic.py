@@ -0,0 +1,112 @@
+"""
+Synthetic users and blog posts for capacity testing.
+Sizes follow a log-normal word count and tag popularity follows a Zipf-like curve,
+so the corpus has a realistic long tail of short posts and a few very long ones.
+"""
+
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, List
+from summaries import summarize
+
+SYNTHETIC_EMAIL_DOMAIN = "synthetic.techblog.com"
+
+TOPICS = [
+    "Python", "JavaScript", "TypeScript", "React", "FastAPI", "MongoDB", "PostgreSQL", "Redis",
+    "Docker", "Kubernetes", "Linux", "DevOps", "AWS", "GCP", "Azure", "Terraform", "Kafka",
+    "System Design", "Microservices", "Security", "Testing", "Performance", "Rust", "Go",
+    "Machine Learning", "Data Engineering", "GraphQL", "REST", "CI/CD", "Observability",
+    "Networking", "Databases", "Caching", "Concurrency", "Algorithms", "Frontend", "Backend",
+]
+
+TITLE_PATTERNS = [
+    "{a} for {b} Developers",
+    "Understanding {a} in Depth",
+    "{a} vs {b}: A Practical Comparison",
+    "Scaling {a} with {b}",
+    "A Beginner's Guide to {a}",
+    "Debugging {a} in Production",
+    "{a} Best Practices",
+    "Lessons Learned Running {a} at Scale",
+]
+
+WORDS = (
+    "the a to of and in is for that with on as it be are this by from or can at an your "
+    "request response server client cache index query latency throughput memory thread process "
+    "deploy container cluster node service pattern design data stream event message queue "
+    "function method class module package config error retry timeout connection pool replica "
+    "shard partition schema model api endpoint token session user read write update delete"
+).split()
+
+CODE_SNIPPETS = [
+    "```python\nasync def handler(request):\n    return await service.fetch(request.id)\n```",
+    "```bash\ndocker compose up -d --build\n```",
+    "```javascript\nconst result = await fetch(url).then((r) => r.json())\n```",
+    "```sql\nSELECT id, title FROM posts ORDER BY created_at DESC LIMIT 20;\n```",
+]
+
+
+def tag_weights(count: int, exponent: float) -> List[float]:
+    return [1.0 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def generate_users(count: int, password_hash: str) -> Iterator[dict]:
+    for i in range(count):
+        yield {
+            "name": f"Synthetic Author {i}",
+            "email": f"author{i}@{SYNTHETIC_EMAIL_DOMAIN}",
+            "password": password_hash,
+        }
+
+
+def generate_content(rng: random.Random, word_count: int) -> str:
+    sections = []
+    remaining = word_count
+    while remaining > 0:
+        paragraph = min(remaining, rng.randint(40, 160))
+        remaining -= paragraph
+        sections.append(" ".join(rng.choices(WORDS, k=paragraph)).capitalize() + ".")
+        if rng.random() < 0.25:
+            sections.append(rng.choice(CODE_SNIPPETS))
+        if rng.random() < 0.2:
+            sections.append(f"## {rng.choice(TOPICS)} {rng.choice(WORDS)}")
+    return "\n\n".join(sections)
+
+
+def generate_posts(
+    count: int,
+    authors: List[dict],
+    seed: int = 42,
+    median_words: int = 800,
+    sigma: float = 0.8,
+    max_tags: int = 5,
+    tag_skew: float = 1.1,
+    days: int = 730,
+) -> Iterator[dict]:
+    """Yield `count` post documents; `authors` are dicts with `_id` and `name`."""
+    rng = random.Random(seed)
+    weights = tag_weights(len(TOPICS), tag_skew)
+    now = datetime.utcnow().replace(microsecond=0)
+    mu = math.log(median_words)
+
+    for i in range(count):
+        a, b = rng.sample(TOPICS, 2)
+        word_count = max(20, int(rng.lognormvariate(mu, sigma)))
+        tags = sorted(set(rng.choices(TOPICS, weights=weights, k=rng.randint(1, max_tags))))
+        content = f"# {a}\n\n" + generate_content(rng, word_count)
+        author = authors[rng.randrange(len(authors))]
+        created_at = now - timedelta(seconds=rng.randrange(days * 86400))
+        updated_at = created_at
+        if rng.random() < 0.2:
+            updated_at = min(now, created_at + timedelta(seconds=rng.randrange(86400 * 30)))
+        yield {
+            "title": f"{rng.choice(TITLE_PATTERNS).format(a=a, b=b)} #{i}",
+            "content": content,
+            "tags": tags,
+            **summarize(content),
+            "author": author["name"],
+            "author_id": str(author["_id"]),
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
@@ -0,0 +1,91 @@
+"""
+Materialized tag counts. `tag_stats` is the source of truth shared by all workers and is
+maintained with $inc deltas on every blog write; each worker serves reads from an in-memory
+copy that it patches locally and re-syncs from the collection periodically.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Iterable, List
+from pymongo import DeleteOne, UpdateOne
+from database import blogs_collection, tag_stats_collection
+from suggest import PrefixIndex
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL_SECONDS = 30
+
+
+def tag_delta(old_tags: Iterable[str], new_tags: Iterable[str]) -> Counter:
+    delta = Counter(set(new_tags))
+    delta.subtract(Counter(set(old_tags)))
+    return Counter({tag: n for tag, n in delta.items() if n})
+
+
+class TagCounts:
+    def __init__(self, collection):
+        self.collection = collection
+        self.counts: Counter = Counter()
+        self.suggestions = PrefixIndex()
+
+    async def apply(self, old_tags: Iterable[str], new_tags: Iterable[str]):
+        delta = tag_delta(old_tags, new_tags)
+        if not delta:
+            return
+        self.counts.update(delta)
+        operations = []
+        for tag, n in delta.items():
+            operations.append(UpdateOne({"_id": tag}, {"$inc": {"count": n}}, upsert=True))
+            if n < 0:
+                operations.append(DeleteOne({"_id": tag, "count": {"$lte": 0}}))
+                if self.counts[tag] <= 0:
+                    del self.counts[tag]
+            if tag in self.counts:
+                self.suggestions.upsert(tag, tag, self.counts[tag])
+            else:
+                self.suggestions.remove(tag)
+        await self.collection.bulk_write(operations, ordered=False)
+
+    async def load(self):
+        counts = Counter()
+        async for stat in self.collection.find({"count": {"$gt": 0}}):
+            counts[stat["_id"]] = stat["count"]
+        self._replace(counts)
+
+    async def rebuild(self, blogs):
+        """Recount from the blogs themselves; used to bootstrap an empty tag_stats collection."""
+        pipeline = [
+            {"$project": {"tags": {"$setUnion": [{"$ifNull": ["$tags", []]}, []]}}},
+            {"$unwind": "$tags"},
+            {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+        ]
+        counts = Counter({row["_id"]: row["count"] async for row in blogs.aggregate(pipeline)})
+        if counts:
+            await self.collection.bulk_write(
+                [UpdateOne({"_id": tag}, {"$set": {"count": n}}, upsert=True) for tag, n in counts.items()],
+                ordered=False,
+            )
+        await self.collection.delete_many({"_id": {"$nin": list(counts)}})
+        self._replace(counts)
+
+    def _replace(self, counts: Counter):
+        self.counts = counts
+        self.suggestions.build((tag, tag, n) for tag, n in counts.items())
+
+    def top(self, limit: int) -> List[dict]:
+        return [{"tag": tag, "count": n} for tag, n in self.counts.most_common(limit)]
+
+
+tag_counts = TagCounts(tag_stats_collection)
+
+
+async def sync_tag_counts():
+    if not await tag_stats_collection.estimated_document_count():
+        await tag_counts.rebuild(blogs_collection)
+    while True:
+        try:
+            await tag_counts.load()
+        except Exception:
+            logger.exception("Failed to refresh tag counts")
+        await asyncio.sleep(REFRESH_INTERVAL_SECONDS)
@@ -0,0 +1,117 @@
+"""
+NDJSON encoding for blog export/import. Documents use MongoDB Extended JSON (relaxed),
+so ObjectIds and dates survive the round trip.
+"""
+
+import time
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from bson import json_util
+
+EXPORT_CHUNK_DOCS = 200
+IMPORT_BATCH_SIZE = 1000
+STRING_FIELDS = ("title", "content", "author", "author_id")
+TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+
+def encode(doc: dict) -> bytes:
+    return json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS).encode("utf-8") + b"\n"
+
+
+def decode(line: bytes) -> dict:
+    """Parse one line into a document; anything malformed raises ValueError."""
+    try:
+        doc = json_util.loads(line)
+    except Exception as exc:
+        # Bad Extended JSON values surface as InvalidId, IndexError, TypeError, ... rather than ValueError.
+        raise ValueError(f"undecodable line: {exc}") from exc
+    if not isinstance(doc, dict):
+        raise ValueError("line is not a JSON object")
+    return doc
+
+
+def is_valid(doc: dict) -> bool:
+    """Required fields present with the types the API and indexes rely on; optional ones typed if present."""
+    tags = doc.get("tags", [])
+    return (
+        all(isinstance(doc.get(field), str) for field in STRING_FIELDS)
+        and all(isinstance(doc.get(field), datetime) for field in TIMESTAMP_FIELDS)
+        and isinstance(tags, list) and all(isinstance(tag, str) for tag in tags)
+        and isinstance(doc.get("excerpt", ""), str)
+        and all(type(doc.get(field, 0)) is int for field in ("word_count", "reading_time", "views"))
+    )
+
+
+class TransferStats:
+    def __init__(self):
+        self.runs = 0
+        self.documents = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.last: Optional[dict] = None
+
+    def record(self, documents: int, size: int, seconds: float, **extra):
+        self.runs += 1
+        self.documents += documents
+        self.bytes += size
+        self.seconds += seconds
+        self.last = {
+            "documents": documents,
+            "bytes": size,
+            "seconds": round(seconds, 3),
+            "docs_per_second": round(documents / seconds) if seconds else None,
+            **extra,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "documents": self.documents,
+            "bytes": self.bytes,
+            "docs_per_second": round(self.documents / self.seconds) if self.seconds else None,
+            "last": self.last,
+        }
+
+
+async def stream_ndjson(cursor, stats: TransferStats, gzip: bool = False) -> AsyncIterator[bytes]:
+    """Encode a cursor as NDJSON in chunks; memory stays bounded by one cursor batch plus one chunk."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    start = time.perf_counter()
+    documents = size = 0
+    chunk = []
+    try:
+        async for doc in cursor:
+            chunk.append(encode(doc))
+            documents += 1
+            if len(chunk) >= EXPORT_CHUNK_DOCS:
+                data = b"".join(chunk)
+                chunk = []
+                data = compressor.compress(data) if compressor else data
+                size += len(data)
+                if data:
+                    yield data
+        data = b"".join(chunk)
+        if compressor:
+            data = compressor.compress(data) + compressor.flush()
+        size += len(data)
+        if data:
+            yield data
+    finally:
+        stats.record(documents, size, time.perf_counter() - start)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], gzip: bool = False) -> AsyncIterator[bytes]:
+    """Split a (possibly gzip-compressed) byte stream into non-empty lines."""
+    decompressor = zlib.decompressobj(31) if gzip else None
+    buffer = b""
+    async for chunk in chunks:
+        buffer += decompressor.decompress(chunk) if decompressor else chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if decompressor:
+        buffer += decompressor.flush()
+    if buffer.strip():
+        yield buffer
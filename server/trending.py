@@ -0,0 +1,76 @@
+"""
+Time-decayed trending ranking.
+
+Each post keeps `trend.score` (reads decayed with an exponential half-life as of `trend.at`)
+and `trend.rank = log2(score) + at / half_life`. Decaying every post by the same factor
+preserves order, so sorting on the indexed `trend.rank` orders posts by their decayed score
+at any moment without rewriting them. The ranking itself is refreshed in the background.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+HALF_LIFE_SECONDS = float(os.getenv("TRENDING_HALF_LIFE_SECONDS", str(24 * 3600)))
+REFRESH_INTERVAL_SECONDS = float(os.getenv("TRENDING_REFRESH_SECONDS", "60"))
+TRENDING_SIZE = 100
+
+
+def trend_stages(reads: float, now: datetime) -> list:
+    """Aggregation-pipeline update stages folding `reads` into the decayed trend score."""
+    half_life_ms = HALF_LIFE_SECONDS * 1000
+    elapsed = {"$subtract": [now, {"$ifNull": ["$trend.at", now]}]}
+    decayed = {"$multiply": [{"$ifNull": ["$trend.score", 0]}, {"$pow": [0.5, {"$divide": [elapsed, half_life_ms]}]}]}
+    return [
+        {"$set": {"trend.score": {"$add": [decayed, reads]}, "trend.at": now}},
+        {"$set": {"trend.rank": {"$add": [
+            {"$log": ["$trend.score", 2]},
+            {"$divide": [{"$toLong": "$trend.at"}, half_life_ms]},
+        ]}}},
+    ]
+
+
+def decayed_score(trend: dict, now: datetime) -> float:
+    elapsed = (now - trend["at"]).total_seconds()
+    return trend["score"] * 0.5 ** (elapsed / HALF_LIFE_SECONDS)
+
+
+class TrendingFeed:
+    def __init__(self, collection, projection: dict, serialize: Callable[[dict], dict]):
+        self.collection = collection
+        self.projection = projection
+        self.serialize = serialize
+        self.ranking: List[dict] = []
+        self.refreshed_at = None
+
+    async def refresh(self):
+        now = datetime.utcnow()
+        blogs = await (
+            self.collection.find({"trend.rank": {"$exists": True}}, self.projection)
+            .sort("trend.rank", -1)
+            .limit(TRENDING_SIZE)
+            .to_list(TRENDING_SIZE)
+        )
+        self.ranking = [
+            {**self.serialize(blog), "trend_score": round(decayed_score(blog["trend"], now), 4)}
+            for blog in blogs
+        ]
+        self.refreshed_at = now
+
+    def top(self, limit: int) -> List[dict]:
+        return self.ranking[:limit]
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh trending feed")
+            await asyncio.sleep(REFRESH_INTERVAL_SECONDS)
+
+    def stats(self) -> dict:
+        return {"posts": len(self.ranking), "refreshed_at": self.refreshed_at}